@@ -0,0 +1,308 @@
+"""Benchmarks for Crossword and CrosswordCreator
+
+Times Crossword construction and CrosswordCreator.solve() over the bundled
+data.zip fixtures and over generated grids and word lists, for several
+solver configurations. Results are saved as JSON; pass --baseline with an
+earlier results file to flag performance regressions. Cases where the
+configurations, backends included, finish with different statuses are
+reported as mismatches.
+
+    python benchmark.py --output results.json
+    python benchmark.py --baseline results.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import zipfile
+from collections import defaultdict
+
+from crosswordAi import Crossword, CrosswordCreator, np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_ZIP = os.path.join(HERE, "data.zip")
+
+# Solver configurations compared on every case, as solve() keyword arguments
+# plus an optional CrosswordCreator backend
+CONFIGS = {
+    "first": {"strategy": "first"},
+    "mrv": {"strategy": "mrv"},
+    "mrv-lcv": {"strategy": "mrv-lcv"},
+    "mrv-mac": {"strategy": "mrv", "inference": "mac"},
+    "luby-learn": {"strategy": "mrv", "restarts": "luby", "learn": True},
+    "backjump": {"strategy": "mrv", "backjumping": True},
+}
+if np is not None:
+    CONFIGS["mrv-numpy"] = {"strategy": "mrv", "backend": "numpy"}
+    CONFIGS["mrv-mac-numpy"] = {"strategy": "mrv", "inference": "mac", "backend": "numpy"}
+
+# Generated grids: (height/width, block density, symmetry)
+GRIDS = [
+    (5, 0.15, "rotational"),
+    (9, 0.2, "rotational"),
+    (13, 0.25, "rotational"),
+    (15, 0.2, "mirror"),
+    (21, 0.25, "rotational"),
+]
+QUICK_GRIDS = GRIDS[:2]
+
+# Generated word list sizes
+WORD_COUNTS = [10000, 100000]
+QUICK_WORD_COUNTS = [10000]
+
+def unpack_fixtures(directory):
+    """Extract data.zip into directory, return the path of its data folder"""
+    with zipfile.ZipFile(DATA_ZIP) as archive:
+        archive.extractall(directory)
+    return os.path.join(directory, "data")
+
+def generate_grid(size, density, symmetry="rotational", seed=0):
+    """Return structure text for a size x size grid with random blocks
+
+    symmetry is "rotational" (180 degree, as in most published puzzles),
+    "mirror" (left-right) or "none".
+    """
+    rng = random.Random(seed)
+    open_cells = [[True] * size for _ in range(size)]
+    for i in range(size):
+        for j in range(size):
+            if rng.random() < density:
+                open_cells[i][j] = False
+                if symmetry == "rotational":
+                    open_cells[size - 1 - i][size - 1 - j] = False
+                elif symmetry == "mirror":
+                    open_cells[i][size - 1 - j] = False
+    return "\n".join(
+        "".join("_" if cell else "#" for cell in row) for row in open_cells
+    )
+
+def generate_words(count, sample_words, seed=0):
+    """Return count distinct words drawn from a letter bigram model of sample_words
+
+    The sample words themselves are included first, so the generated list
+    still contains real words and keeps a realistic letter distribution.
+    """
+    rng = random.Random(seed)
+    # Sorted, so the list does not depend on set order (PYTHONHASHSEED)
+    sample = sorted(set(word.upper() for word in sample_words if word.isalpha()))
+
+    # Letter bigram counts, with "^" and "$" marking word boundaries
+    transitions = defaultdict(lambda: defaultdict(int))
+    lengths = []
+    for word in sample:
+        lengths.append(len(word))
+        previous = "^"
+        for letter in word + "$":
+            transitions[previous][letter] += 1
+            previous = letter
+    choices = {
+        letter: (list(following), list(following.values()))
+        for letter, following in transitions.items()
+    }
+
+    words = set(sample[:count])
+    while len(words) < count:
+        length = rng.choice(lengths)
+        word = []
+        previous = "^"
+        while len(word) < length:
+            letters, weights = choices[previous]
+            letter = rng.choices(letters, weights)[0]
+            if letter == "$":
+                # Restart words that end early so lengths follow the sample
+                word = []
+                previous = "^"
+                continue
+            word.append(letter)
+            previous = letter
+        words.add("".join(word))
+    return sorted(words)
+
+def fixture_cases(data_dir):
+    """Return (name, structure text, words file) for the bundled fixtures"""
+    cases = []
+    for k in range(3):
+        structure_file = os.path.join(data_dir, f"structure{k}.txt")
+        with open(structure_file) as f:
+            structure = f.read()
+        cases.append((f"structure{k}-words{k}", structure, os.path.join(data_dir, f"words{k}.txt")))
+        if k != 2:
+            cases.append((f"structure{k}-words2", structure, os.path.join(data_dir, "words2.txt")))
+        if k == 1:
+            # words0.txt has no word for some slot lengths of structure1.txt
+            cases.append(("structure1-words0", structure, os.path.join(data_dir, "words0.txt")))
+    return cases
+
+def synthetic_cases(data_dir, work_dir, grids, word_counts):
+    """Return (name, structure text, words file) for generated grids and word lists"""
+    with open(os.path.join(data_dir, "words2.txt")) as f:
+        sample = f.read().split()
+
+    cases = []
+    for count in word_counts:
+        words_file = os.path.join(work_dir, f"words{count}.txt")
+        with open(words_file, "w") as f:
+            f.write("\n".join(generate_words(count, sample)))
+        for size, density, symmetry in grids:
+            structure = generate_grid(size, density, symmetry)
+            name = f"grid{size}-{int(density * 100)}-{symmetry}-words{count}"
+            cases.append((name, structure, words_file))
+    return cases
+
+def input_digest(structure, words_file):
+    """Return the SHA-1 of a case's structure and word list, to check baselines ran the same inputs"""
+    digest = hashlib.sha1(structure.encode())
+    with open(words_file, "rb") as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+def run_case(name, structure, words_file, configs, timeout, repeat):
+    """Time one case under every configuration, return a list of result dicts"""
+    digest = input_digest(structure, words_file)
+    results = []
+    for config_name, options in configs.items():
+        options = dict(options)
+        backend = options.pop("backend", "bitset")
+        build_times = []
+        solve_times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            crossword = Crossword(structure_text=structure, words_file=words_file)
+            built = time.perf_counter()
+            creator = CrosswordCreator(crossword, backend=backend)
+            creator.solve(timeout=timeout, **options)
+            solved = time.perf_counter()
+            build_times.append(built - started)
+            solve_times.append(solved - built)
+
+            # A timed-out run will not get faster, skip the repeats
+            if creator.status == "timeout":
+                break
+
+        results.append({
+            "case": name,
+            "config": config_name,
+            "input": digest,
+            "status": creator.status,
+            "variables": len(crossword.variables),
+            "words": len(crossword.words),
+            "build": min(build_times),
+            "solve": min(solve_times),
+            "stats": creator.stats.to_dict(),
+        })
+    return results
+
+def mismatches(results):
+    """Return the cases whose configurations finished with different statuses as messages"""
+    statuses = defaultdict(dict)
+    for result in results["results"]:
+        if result["status"] in ("solved", "unsatisfiable"):
+            statuses[result["case"]][result["config"]] = result["status"]
+    messages = []
+    for case, by_config in statuses.items():
+        if len(set(by_config.values())) > 1:
+            found = ", ".join(f"{config} {status}" for config, status in sorted(by_config.items()))
+            messages.append(f"{case}: {found}")
+    return messages
+
+def compare(results, baseline, tolerance, min_seconds):
+    """Return the regressions of results against baseline as messages"""
+    previous = {(r["case"], r["config"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results["results"]:
+        key = (result["case"], result["config"])
+        old = previous.get(key)
+        if old is None:
+            continue
+        if "input" in old and old["input"] != result["input"]:
+            regressions.append(f"{key[0]} [{key[1]}]: inputs differ from the baseline, not compared")
+            continue
+        if old["status"] == "solved" and result["status"] != "solved":
+            regressions.append(f"{key[0]} [{key[1]}]: {result['status']}, was solved")
+            continue
+        for phase in ("build", "solve"):
+            limit = old[phase] * (1 + tolerance)
+            if result[phase] > limit and result[phase] - old[phase] > min_seconds:
+                regressions.append(
+                    f"{key[0]} [{key[1]}]: {phase} {result[phase]:.4f}s, was {old[phase]:.4f}s"
+                )
+    return regressions
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Benchmark the crossword solver.")
+    parser.add_argument("-o", "--output", default="benchmark_results.json",
+                        help="where to save the results (default: %(default)s)")
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown as a fraction (default: %(default)s)")
+    parser.add_argument("--min-seconds", type=float, default=0.005,
+                        help="ignore slowdowns smaller than this (default: %(default)s)")
+    parser.add_argument("-t", "--timeout", type=float, default=30,
+                        help="time budget per solve in seconds (default: %(default)s)")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="runs per measurement, the fastest is kept (default: %(default)s)")
+    parser.add_argument("-c", "--config", action="append", choices=sorted(CONFIGS),
+                        help="solver configuration to run, may be repeated (default: all)")
+    parser.add_argument("--quick", action="store_true",
+                        help="only the fixtures and the smallest generated cases")
+    parser.add_argument("--no-synthetic", action="store_true",
+                        help="only the bundled fixtures")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Run the benchmarks, return 1 if configurations disagree or regressions were found"""
+    args = parse_args(argv)
+    configs = {name: CONFIGS[name] for name in (args.config or CONFIGS)}
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        data_dir = unpack_fixtures(work_dir)
+        cases = fixture_cases(data_dir)
+        if not args.no_synthetic:
+            grids = QUICK_GRIDS if args.quick else GRIDS
+            word_counts = QUICK_WORD_COUNTS if args.quick else WORD_COUNTS
+            cases += synthetic_cases(data_dir, work_dir, grids, word_counts)
+
+        results = {
+            "meta": {
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "timeout": args.timeout,
+                "repeat": args.repeat,
+            },
+            "results": [],
+        }
+        for name, structure, words_file in cases:
+            for result in run_case(name, structure, words_file, configs, args.timeout, args.repeat):
+                results["results"].append(result)
+                print(f"{result['case']:40} {result['config']:12} {result['status']:14} "
+                      f"build {result['build']:8.4f}s  solve {result['solve']:8.4f}s")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    # Every configuration and backend that finishes must agree on the status
+    disagreements = mismatches(results)
+    for message in disagreements:
+        print(f"MISMATCH {message}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_seconds)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            return 1
+        print("No regressions against the baseline")
+    return 1 if disagreements else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,504 +1,3125 @@
-import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
-import os
-import random
-import time
-from collections import defaultdict
-import threading
-import math
-
-# Mock crossword classes - replace with your actual imports
-class Variable:
-    def __init__(self, i, j, direction, length):
-        self.i = i
-        self.j = j
-        self.direction = direction
-        self.length = length
-        self.cells = []
-        
-        # Generate cells based on direction
-        if direction == 0:  # ACROSS
-            self.cells = [(i, j + k) for k in range(length)]
-        else:  # DOWN
-            self.cells = [(i + k, j) for k in range(length)]
-
-class Crossword:
-    def __init__(self, structure_file=None, words_file=None, structure_text=None, words_text=None):
-        self.height = 0
-        self.width = 0
-        self.structure = []
-        self.variables = set()
-        self.words = set()
-        self.overlaps = {}
-        
-        # Load structure
-        if structure_file:
-            self.load_structure_from_file(structure_file)
-        elif structure_text:
-            self.load_structure_from_text(structure_text)
-            
-        # Load words
-        if words_file:
-            self.load_words_from_file(words_file)
-        elif words_text:
-            self.load_words_from_text(words_text)
-            
-        # Find variables
-        self.find_variables()
-        # Calculate overlaps
-        self.calculate_overlaps()
-    
-    def load_structure_from_file(self, filename):
-        """Load crossword structure from file"""
-        try:
-            with open(filename, 'r') as f:
-                content = f.read().strip()
-                self.load_structure_from_text(content)
-        except Exception as e:
-            raise Exception(f"Error loading structure file: {e}")
-    
-    def load_structure_from_text(self, content):
-        """Load crossword structure from text"""
-        try:
-            lines = content.strip().split('\n')
-            self.height = len(lines)
-            self.width = len(lines[0]) if lines else 0
-            
-            self.structure = []
-            for line in lines:
-                row = []
-                for char in line:
-                    # True for empty cells (_), False for blocked cells (#)
-                    row.append(char == '_')
-                self.structure.append(row)
-        except Exception as e:
-            raise Exception(f"Error parsing structure: {e}")
-    
-    def load_words_from_file(self, filename):
-        """Load words from file"""
-        try:
-            with open(filename, 'r') as f:
-                content = f.read()
-                self.load_words_from_text(content)
-        except Exception as e:
-            raise Exception(f"Error loading words file: {e}")
-    
-    def load_words_from_text(self, content):
-        """Load words from text"""
-        try:
-            self.words = set()
-            for line in content.split('\n'):
-                word = line.strip().upper()
-                if word and word.isalpha():
-                    self.words.add(word)
-        except Exception as e:
-            raise Exception(f"Error parsing words: {e}")
-    
-    def find_variables(self):
-        """Find all possible word positions in the crossword"""
-        self.variables = set()
-        
-        # Find horizontal variables (ACROSS)
-        for i in range(self.height):
-            j = 0
-            while j < self.width:
-                if self.structure[i][j]:
-                    # Start of a potential word
-                    start_j = j
-                    length = 0
-                    while j < self.width and self.structure[i][j]:
-                        length += 1
-                        j += 1
-                    
-                    # Add variable if length >= 2
-                    if length >= 2:
-                        var = Variable(i, start_j, 0, length)  # 0 = ACROSS
-                        self.variables.add(var)
-                else:
-                    j += 1
-        
-        # Find vertical variables (DOWN)
-        for j in range(self.width):
-            i = 0
-            while i < self.height:
-                if self.structure[i][j]:
-                    # Start of a potential word
-                    start_i = i
-                    length = 0
-                    while i < self.height and self.structure[i][j]:
-                        length += 1
-                        i += 1
-                    
-                    # Add variable if length >= 2
-                    if length >= 2:
-                        var = Variable(start_i, j, 1, length)  # 1 = DOWN
-                        self.variables.add(var)
-                else:
-                    i += 1
-    
-    def calculate_overlaps(self):
-        """Calculate overlaps between variables"""
-        self.overlaps = {}
-        variables_list = list(self.variables)
-        
-        for i, var1 in enumerate(variables_list):
-            for j, var2 in enumerate(variables_list):
-                if i != j:
-                    overlap = None
-                    
-                    # Find intersection point
-                    for idx1, cell1 in enumerate(var1.cells):
-                        for idx2, cell2 in enumerate(var2.cells):
-                            if cell1 == cell2:
-                                overlap = (idx1, idx2)
-                                break
-                        if overlap:
-                            break
-                    
-                    self.overlaps[(var1, var2)] = overlap
-
-class CrosswordCreator:
-    def __init__(self, crossword):
-        self.crossword = crossword
-        self.domains = {}
-        
-        # Initialize domains
-        for variable in crossword.variables:
-            self.domains[variable] = [word for word in crossword.words if len(word) == variable.length]
-    
-    def solve(self):
-        """Solve the crossword using backtracking"""
-        assignment = {}
-        if self.backtrack(assignment):
-            return assignment
-        return None
-    
-    def backtrack(self, assignment):
-        """Backtracking search"""
-        if len(assignment) == len(self.crossword.variables):
-            return True
-        
-        # Select unassigned variable
-        var = self.select_unassigned_variable(assignment)
-        
-        for word in self.order_domain_values(var, assignment):
-            if self.consistent(var, word, assignment):
-                assignment[var] = word
-                
-                if self.backtrack(assignment):
-                    return True
-                
-                del assignment[var]
-        
-        return False
-    
-    def select_unassigned_variable(self, assignment):
-        """Select next variable to assign"""
-        unassigned = [v for v in self.crossword.variables if v not in assignment]
-        return unassigned[0] if unassigned else None
-    
-    def order_domain_values(self, var, assignment):
-        """Order domain values"""
-        return self.domains[var]
-    
-    def consistent(self, var, value, assignment):
-        """Check if assignment is consistent"""
-        for other_var, other_value in assignment.items():
-            if var != other_var:
-                overlap = self.crossword.overlaps.get((var, other_var))
-                if overlap:
-                    i, j = overlap
-                    if i < len(value) and j < len(other_value):
-                        if value[i] != other_value[j]:
-                            return False
-        return True
-    
-    def letter_grid(self, assignment):
-        """Create letter grid from assignment"""
-        grid = [[None for _ in range(self.crossword.width)] for _ in range(self.crossword.height)]
-        
-        for variable, word in assignment.items():
-            for idx, (i, j) in enumerate(variable.cells):
-                if 0 <= i < self.crossword.height and 0 <= j < self.crossword.width:
-                    grid[i][j] = word[idx]
-        
-        return grid
-
-class CrosswordGUI:
-    def __init__(self, master):
-        self.master = master
-        self.master.title("Crossword Puzzle Generator")
-        self.master.geometry("1200x800")
-        
-        # Initialize variables
-        self.assignment = None
-        self.crossword = None
-        
-        self.setup_ui()
-    
-    def setup_ui(self):
-        # Create main frame
-        main_frame = ttk.Frame(self.master, padding="10")
-        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        
-        # Configure grid weights
-        self.master.columnconfigure(0, weight=1)
-        self.master.rowconfigure(0, weight=1)
-        main_frame.columnconfigure(1, weight=1)
-        main_frame.rowconfigure(2, weight=1)
-        
-        # Input frame
-        input_frame = ttk.LabelFrame(main_frame, text="Input", padding="10")
-        input_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
-        input_frame.columnconfigure(1, weight=1)
-        
-        # Structure input
-        ttk.Label(input_frame, text="Structure:").grid(row=0, column=0, sticky=tk.W, pady=(0, 5))
-        ttk.Label(input_frame, text="(Use '_' for empty cells, '#' for blocked cells)").grid(row=0, column=1, sticky=tk.W, pady=(0, 5))
-        
-        self.structure_text = tk.Text(input_frame, height=8, width=50)
-        self.structure_text.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
-        
-        structure_scroll = ttk.Scrollbar(input_frame, orient=tk.VERTICAL, command=self.structure_text.yview)
-        structure_scroll.grid(row=1, column=2, sticky=(tk.N, tk.S), pady=(0, 10))
-        self.structure_text.config(yscrollcommand=structure_scroll.set)
-        
-        # Words input
-        ttk.Label(input_frame, text="Words:").grid(row=2, column=0, sticky=tk.W, pady=(0, 5))
-        ttk.Label(input_frame, text="(One word per line)").grid(row=2, column=1, sticky=tk.W, pady=(0, 5))
-        
-        self.words_text = tk.Text(input_frame, height=8, width=50)
-        self.words_text.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
-        
-        words_scroll = ttk.Scrollbar(input_frame, orient=tk.VERTICAL, command=self.words_text.yview)
-        words_scroll.grid(row=3, column=2, sticky=(tk.N, tk.S), pady=(0, 10))
-        self.words_text.config(yscrollcommand=words_scroll.set)
-        
-        # Control frame
-        control_frame = ttk.Frame(main_frame)
-        control_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
-        
-        # Buttons
-        ttk.Button(control_frame, text="Load Structure File", 
-                  command=self.load_structure_file).pack(side=tk.LEFT, padx=(0, 5))
-        ttk.Button(control_frame, text="Load Words File", 
-                  command=self.load_words_file).pack(side=tk.LEFT, padx=(0, 5))
-        ttk.Button(control_frame, text="Generate Crossword", 
-                  command=self.generate_crossword).pack(side=tk.LEFT, padx=(0, 5))
-        ttk.Button(control_frame, text="Clear Canvas", 
-                  command=self.clear_canvas).pack(side=tk.LEFT, padx=(0, 5))
-        ttk.Button(control_frame, text="Clear All", 
-                  command=self.clear_all).pack(side=tk.LEFT, padx=(0, 5))
-        
-        # Status label
-        self.status_label = ttk.Label(main_frame, text="Enter structure and words, then click Generate Crossword")
-        self.status_label.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 5))
-        
-        # Canvas with scrollbars
-        canvas_frame = ttk.LabelFrame(main_frame, text="Crossword", padding="5")
-        canvas_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
-        canvas_frame.columnconfigure(0, weight=1)
-        canvas_frame.rowconfigure(0, weight=1)
-        
-        self.canvas = tk.Canvas(canvas_frame, width=800, height=400, bg="white")
-        
-        # Scrollbars
-        v_scrollbar = ttk.Scrollbar(canvas_frame, orient=tk.VERTICAL, command=self.canvas.yview)
-        h_scrollbar = ttk.Scrollbar(canvas_frame, orient=tk.HORIZONTAL, command=self.canvas.xview)
-        
-        self.canvas.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
-        
-        # Grid scrollbars and canvas
-        self.canvas.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        v_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
-        h_scrollbar.grid(row=1, column=0, sticky=(tk.W, tk.E))
-        
-        # Add sample data
-        self.add_sample_data()
-    
-    def add_sample_data(self):
-        """Add sample data to help users understand the format"""
-        sample_structure = """#___#
-#_##_
-#_##_
-#_##_
-#____"""
-        
-        sample_words = """one
-two
-three
-four
-five
-six
-seven
-eight
-nine
-ten"""
-        
-        self.structure_text.insert(tk.END, sample_structure)
-        self.words_text.insert(tk.END, sample_words)
-    
-    def load_structure_file(self):
-        """Load structure from file"""
-        filename = filedialog.askopenfilename(
-            title="Select Structure File",
-            filetypes=[("Text Files", "*.txt"), ("All Files", "*.*")]
-        )
-        
-        if filename:
-            try:
-                with open(filename, 'r') as f:
-                    content = f.read()
-                self.structure_text.delete(1.0, tk.END)
-                self.structure_text.insert(1.0, content)
-                self.status_label.config(text=f"Structure loaded: {os.path.basename(filename)}")
-                messagebox.showinfo("Success", f"Structure file loaded: {os.path.basename(filename)}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not load structure file: {str(e)}")
-    
-    def load_words_file(self):
-        """Load words from file"""
-        filename = filedialog.askopenfilename(
-            title="Select Words File",
-            filetypes=[("Text Files", "*.txt"), ("All Files", "*.*")]
-        )
-        
-        if filename:
-            try:
-                with open(filename, 'r') as f:
-                    content = f.read()
-                self.words_text.delete(1.0, tk.END)
-                self.words_text.insert(1.0, content)
-                self.status_label.config(text=f"Words loaded: {os.path.basename(filename)}")
-                messagebox.showinfo("Success", f"Words file loaded: {os.path.basename(filename)}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not load words file: {str(e)}")
-    
-    def generate_crossword(self):
-        """Generate crossword puzzle"""
-        structure_content = self.structure_text.get(1.0, tk.END).strip()
-        words_content = self.words_text.get(1.0, tk.END).strip()
-        
-        if not structure_content or not words_content:
-            messagebox.showerror("Error", "Please enter both structure and words.")
-            return
-        
-        try:
-            self.status_label.config(text="Generating crossword...")
-            self.master.update()
-            
-            # Create crossword
-            self.crossword = Crossword(structure_text=structure_content, words_text=words_content)
-            
-            if not self.crossword.variables:
-                messagebox.showerror("Error", "No valid word positions found in the structure.")
-                self.status_label.config(text="No valid word positions found")
-                return
-            
-            if not self.crossword.words:
-                messagebox.showerror("Error", "No valid words found in the word list.")
-                self.status_label.config(text="No valid words found")
-                return
-            
-            # Create solver
-            creator = CrosswordCreator(self.crossword)
-            
-            # Solve
-            self.assignment = creator.solve()
-            
-            if self.assignment:
-                self.status_label.config(text="Crossword generated successfully!")
-                self.draw_crossword()
-                messagebox.showinfo("Success", "Crossword generated successfully!")
-            else:
-                self.status_label.config(text="Failed to generate crossword")
-                messagebox.showerror("Error", "Could not generate a valid crossword with the given words. Try adding more words or simplifying the structure.")
-                
-        except Exception as e:
-            self.status_label.config(text="Error occurred")
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
-    
-    def draw_crossword(self):
-        """Draw the crossword on canvas"""
-        if not self.crossword or not self.assignment:
-            return
-        
-        self.canvas.delete("all")
-        
-        cell_size = 40
-        border_width = 2
-        
-        # Calculate canvas size
-        canvas_width = self.crossword.width * cell_size + 20
-        canvas_height = self.crossword.height * cell_size + 20
-        
-        self.canvas.config(scrollregion=(0, 0, canvas_width, canvas_height))
-        
-        # Get letter grid
-        creator = CrosswordCreator(self.crossword)
-        letters = creator.letter_grid(self.assignment)
-        
-        # Draw grid
-        for i in range(self.crossword.height):
-            for j in range(self.crossword.width):
-                x0 = j * cell_size + 10
-                y0 = i * cell_size + 10
-                x1 = x0 + cell_size
-                y1 = y0 + cell_size
-                
-                if self.crossword.structure[i][j]:
-                    # White cell (open space)
-                    self.canvas.create_rectangle(x0, y0, x1, y1, 
-                                               fill="white", outline="black", width=border_width)
-                    
-                    # Add letter if exists
-                    if letters[i][j]:
-                        self.canvas.create_text(x0 + cell_size//2, y0 + cell_size//2, 
-                                              text=letters[i][j], 
-                                              font=("Arial", 16, "bold"), 
-                                              fill="black")
-                else:
-                    # Black cell (blocked)
-                    self.canvas.create_rectangle(x0, y0, x1, y1, 
-                                               fill="gray", outline="darkgray")
-        
-        # Add word numbers (optional)
-        self.add_word_numbers(cell_size)
-    
-    def add_word_numbers(self, cell_size):
-        """Add numbers to starting positions of words"""
-        word_num = 1
-        numbered_cells = set()
-        
-        for variable in self.crossword.variables:
-            start_i, start_j = variable.cells[0]
-            
-            if (start_i, start_j) not in numbered_cells:
-                x = start_j * cell_size + 10 + 5
-                y = start_i * cell_size + 10 + 5
-                
-                self.canvas.create_text(x, y, text=str(word_num), 
-                                      font=("Arial", 8, "bold"), 
-                                      fill="blue", anchor="nw")
-                
-                numbered_cells.add((start_i, start_j))
-                word_num += 1
-    
-    def clear_canvas(self):
-        """Clear the canvas"""
-        self.canvas.delete("all")
-        self.status_label.config(text="Canvas cleared")
-    
-    def clear_all(self):
-        """Clear everything"""
-        self.canvas.delete("all")
-        self.structure_text.delete(1.0, tk.END)
-        self.words_text.delete(1.0, tk.END)
-        self.assignment = None
-        self.crossword = None
-        self.status_label.config(text="All cleared. Enter structure and words to begin.")
-
-if __name__ == "__main__":
-    root = tk.Tk()
-    app = CrosswordGUI(root)
-    root.mainloop()
+try:
+    import numpy as np
+except ImportError:
+    # Only the optional numpy backend needs it
+    np = None
+
+try:
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, ttk
+except ImportError:
+    # Headless installs can still use the solver and the batch CLI
+    tk = None
+import argparse
+import contextlib
+from array import array
+import gzip
+import io
+import hashlib
+import json
+import os
+import sys
+import random
+import time
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import mmap
+import multiprocessing
+import queue
+import struct
+import tempfile
+import threading
+import math
+import zipfile
+
+# Mock crossword classes - replace with your actual imports
+class Variable:
+    def __init__(self, i, j, direction, length):
+        self.i = i
+        self.j = j
+        self.direction = direction
+        self.length = length
+        self.cells = []
+        
+        # Generate cells based on direction
+        if direction == 0:  # ACROSS
+            self.cells = [(i, j + k) for k in range(length)]
+        else:  # DOWN
+            self.cells = [(i + k, j) for k in range(length)]
+        
+        # Variables compare by position so they survive pickling, e.g.
+        # assignments returned from worker processes
+        self._hash = hash((i, j, direction, length))
+    
+    def __eq__(self, other):
+        if not isinstance(other, Variable):
+            return NotImplemented
+        return (self.i, self.j, self.direction, self.length) == (other.i, other.j, other.direction, other.length)
+    
+    def __hash__(self):
+        return self._hash
+    
+    def __repr__(self):
+        return f"Variable({self.i}, {self.j}, {self.direction}, {self.length})"
+
+# Binary word cache layout (all little-endian):
+#   header: magic, version, source size, source mtime (ns), number of lengths
+#   one entry per length: length, word count, rows offset, masks offset, mask count,
+#   scores offset (0 when the words have no scores)
+#   rows: count * length letter bytes, words sorted
+#   masks: mask count * (position, letter, offset) entries, each mask being
+#   ceil(count / 8) bytes with bit k set for word k
+#   scores: count doubles, the score of word k at k
+WORD_CACHE_MAGIC = b"CWIX"
+WORD_CACHE_VERSION = 2
+_CACHE_HEADER = struct.Struct("<4sIQQI")
+_CACHE_LENGTH = struct.Struct("<IIQQIQ")
+_CACHE_MASK = struct.Struct("<IIQ")
+
+class WordStore:
+    """Compact word list with no per-word Python objects
+
+    The words of each length are sorted and packed into a single buffer of
+    fixed-width rows, one byte (latin-1 code) per letter. Buffers are
+    either bytes built in memory or views on a memory-mapped cache file,
+    in which case pickling only sends the file path and every process
+    shares the same mapped pages, as long as the file is still the one
+    that was mapped. Supports len(), iteration and `in` like
+    the set of strings it replaces.
+
+    scores optionally holds, per length, an array of word scores in row
+    order; it is empty when the word list had none.
+    """
+    def __init__(self, rows=None, scores=None):
+        self.rows = rows if rows is not None else {}
+        self.scores = scores if scores is not None else {}
+        self.counts = {length: len(buf) // length for length, buf in self.rows.items()}
+        self.cache_file = None
+        self.cache_stamp = None
+        self.mapping = None
+        self._digest = None
+
+    @classmethod
+    def from_words(cls, words, scores=None):
+        """Pack an iterable of distinct words
+
+        scores optionally maps words to their score; words missing from it
+        score 0.
+        """
+        by_length = defaultdict(list)
+        for word in words:
+            try:
+                by_length[len(word)].append(word.encode("latin-1"))
+            except UnicodeEncodeError:
+                continue
+        rows = {}
+        row_scores = {}
+        for length, group in by_length.items():
+            group.sort()
+            rows[length] = b"".join(group)
+            if scores:
+                row_scores[length] = array("d", (scores.get(word.decode("latin-1"), 0.0) for word in group))
+        return cls(rows, row_scores)
+
+    @classmethod
+    def from_lines(cls, lines):
+        """Pack the words of word list lines, read one line at a time
+
+        Words are normalized (see parse_word_line()) and deduplicated as
+        they are read, and held as latin-1 bytes grouped by length until
+        they are packed, so no intermediate list of strings is built.
+        """
+        by_length = defaultdict(dict)
+        scored = False
+        for line in lines:
+            entry = parse_word_line(line)
+            if entry is None:
+                continue
+            word, score = entry
+            try:
+                key = word.encode("latin-1")
+            except UnicodeEncodeError:
+                continue
+            by_length[len(key)][key] = score
+            if score is not None:
+                scored = True
+
+        rows = {}
+        scores = {}
+        for length, group in by_length.items():
+            keys = sorted(group)
+            rows[length] = b"".join(keys)
+            if scored:
+                scores[length] = array("d", (group[key] or 0.0 for key in keys))
+        return cls(rows, scores)
+
+    @staticmethod
+    def read_stamp(f):
+        """Return what identifies an open word cache file: its inode and mtime, and its header
+
+        The header holds the size and mtime of the words file the cache was
+        built from. A rebuilt cache is a new file, so its stamp differs.
+        """
+        stat = os.fstat(f.fileno())
+        f.seek(0)
+        return (stat.st_dev, stat.st_ino, stat.st_mtime_ns, f.read(_CACHE_HEADER.size))
+
+    @classmethod
+    def from_cache(cls, cache_file, stamp=None):
+        """Memory-map a word cache file written by build_word_cache
+
+        With a stamp from read_stamp(), raise an Exception if the file is
+        no longer the one it was taken from.
+        """
+        with open(cache_file, "rb") as f:
+            found = cls.read_stamp(f)
+            if stamp is not None and found != stamp:
+                raise Exception(f"Word cache {cache_file} changed since it was loaded")
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, _, n_lengths = _CACHE_HEADER.unpack_from(mapping, 0)
+        if magic != WORD_CACHE_MAGIC or version != WORD_CACHE_VERSION:
+            mapping.close()
+            raise Exception(f"Not a word cache file: {cache_file}")
+
+        view = memoryview(mapping)
+        rows = {}
+        scores = {}
+        offset = _CACHE_HEADER.size
+        for _ in range(n_lengths):
+            length, count, rows_offset, _, _, scores_offset = _CACHE_LENGTH.unpack_from(mapping, offset)
+            rows[length] = view[rows_offset:rows_offset + count * length]
+            if scores_offset:
+                scores[length] = array("d", mapping[scores_offset:scores_offset + count * 8])
+                if sys.byteorder == "big":
+                    scores[length].byteswap()
+            offset += _CACHE_LENGTH.size
+
+        store = cls(rows, scores)
+        store.cache_file = cache_file
+        store.cache_stamp = found
+        store.mapping = mapping
+        return store
+
+    def cache_unchanged(self):
+        """Return True if the cache file on disk is still the one this store maps"""
+        if not self.cache_file:
+            return False
+        try:
+            with open(self.cache_file, "rb") as f:
+                return self.read_stamp(f) == self.cache_stamp
+        except OSError:
+            return False
+
+    def __reduce__(self):
+        if self.cache_unchanged():
+            return (WordStore.from_cache, (self.cache_file, self.cache_stamp))
+        return (WordStore, ({length: bytes(buf) for length, buf in self.rows.items()}, self.scores))
+
+    def __len__(self):
+        return sum(self.counts.values())
+
+    def __iter__(self):
+        for length in sorted(self.rows):
+            for k in range(self.counts[length]):
+                yield self.word(length, k)
+
+    def __contains__(self, word):
+        return self.find(word) is not None
+
+    def lengths(self):
+        """Return the word lengths present"""
+        return sorted(self.rows)
+
+    def digest(self):
+        """Return a hex digest of the word list, computed once"""
+        if self._digest is None:
+            h = hashlib.sha1()
+            for length in self.lengths():
+                h.update(struct.pack("<II", length, self.counts[length]))
+                h.update(self.rows[length])
+            self._digest = h.hexdigest()
+        return self._digest
+
+    def count(self, length):
+        """Return the number of words of the given length"""
+        return self.counts.get(length, 0)
+
+    def word(self, length, k):
+        """Return word k of the given length"""
+        return bytes(self.rows[length][k * length:(k + 1) * length]).decode("latin-1")
+
+    def score(self, length, k):
+        """Return the score of word k of the given length, 0 without scores"""
+        scores = self.scores.get(length)
+        return scores[k] if scores is not None else 0.0
+
+    def find(self, word):
+        """Return the ID of word within its length, or None if absent"""
+        length = len(word)
+        buf = self.rows.get(length)
+        if buf is None:
+            return None
+        try:
+            key = word.encode("latin-1")
+        except UnicodeEncodeError:
+            return None
+
+        # Binary search over the sorted fixed-width rows
+        lo, hi = 0, self.counts[length]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if bytes(buf[mid * length:(mid + 1) * length]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.counts[length] and bytes(buf[lo * length:(lo + 1) * length]) == key:
+            return lo
+        return None
+
+# Number of score tiers per word length used for optimization bounds
+SCORE_TIERS = 64
+
+class WordIndex:
+    """Positional letter index over a word store
+
+    Words of each length are numbered from 0 in sorted order, and every
+    (length, position, letter) maps to a bitset (a Python int) with bit k
+    set when word k of that length has that letter at that position.
+    Solver domains are bitsets over the same IDs, so keeping only the
+    words that match a crossing letter is a single bitwise AND.
+
+    The solver only handles domains through the methods from full() on,
+    so NumpyWordIndex can stand in with another domain representation.
+    """
+    vectorized = False
+    def __init__(self, store=None, masks=None):
+        self.store = store if store is not None else WordStore()
+        self.masks = masks if masks is not None else self.build_masks(self.store)
+        self.letters_at = defaultdict(list)
+        for length, position, letter in sorted(self.masks):
+            self.letters_at[(length, position)].append(letter)
+
+        # Score tiers per length, built on first use by best_score()
+        self.tiers = {}
+        self.numpy_index = None
+
+    @staticmethod
+    def build_masks(store):
+        """Compute every (length, position, letter) bitset of a store"""
+        masks = {}
+        for length in store.lengths():
+            buf = store.rows[length]
+            for position in range(length):
+                column = bytes(buf[position::length])
+                for code in set(column):
+                    # Turn the column into a '0'/'1' string, lowest ID last
+                    table = bytearray(b"0" * 256)
+                    table[code] = ord("1")
+                    bits = column.translate(table)[::-1]
+                    masks[(length, position, chr(code))] = int(bits, 2)
+        return masks
+
+    @classmethod
+    def from_cache(cls, cache_file, stamp=None):
+        """Load an index from a word cache file, mapping its rows
+
+        stamp is checked as in WordStore.from_cache().
+        """
+        store = WordStore.from_cache(cache_file, stamp)
+        mapping = store.mapping
+        n_lengths = _CACHE_HEADER.unpack_from(mapping, 0)[4]
+
+        masks = {}
+        offset = _CACHE_HEADER.size
+        for _ in range(n_lengths):
+            length, count, _, masks_offset, n_masks, _ = _CACHE_LENGTH.unpack_from(mapping, offset)
+            offset += _CACHE_LENGTH.size
+            size = (count + 7) // 8
+            for m in range(n_masks):
+                position, code, start = _CACHE_MASK.unpack_from(mapping, masks_offset + m * _CACHE_MASK.size)
+                masks[(length, position, chr(code))] = int.from_bytes(mapping[start:start + size], "little")
+        return cls(store, masks)
+
+    def __reduce__(self):
+        # Masks and rows travel together: both are reloaded from the same
+        # cache file, or both are sent by value if it was rebuilt since
+        if self.store.cache_unchanged():
+            return (WordIndex.from_cache, (self.store.cache_file, self.store.cache_stamp))
+        return (WordIndex, (self.store, self.masks))
+
+    def save(self, cache_file, source_size=0, source_mtime=0):
+        """Write the store and masks as a word cache file
+
+        The file is written next to cache_file and renamed over it, so
+        stores that map the old file keep reading it unchanged.
+        """
+        lengths = self.store.lengths()
+        by_length = defaultdict(list)
+        for (length, position, letter), mask in sorted(self.masks.items()):
+            by_length[length].append((position, ord(letter), mask))
+
+        # Each length's rows are followed by its mask table, mask data and scores
+        offset = _CACHE_HEADER.size + _CACHE_LENGTH.size * len(lengths)
+        layout = []
+        for length in lengths:
+            count = self.store.count(length)
+            n_masks = len(by_length[length])
+            rows_offset = offset
+            masks_offset = rows_offset + count * length
+            offset = masks_offset + n_masks * (_CACHE_MASK.size + (count + 7) // 8)
+            scores_offset = 0
+            if length in self.store.scores:
+                scores_offset = offset
+                offset += count * 8
+            layout.append((length, count, rows_offset, masks_offset, n_masks, scores_offset))
+
+        directory = os.path.dirname(os.path.abspath(cache_file))
+        fd, temp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_CACHE_HEADER.pack(WORD_CACHE_MAGIC, WORD_CACHE_VERSION,
+                                           source_size, source_mtime, len(lengths)))
+                for entry in layout:
+                    f.write(_CACHE_LENGTH.pack(*entry))
+                for length, count, _, masks_offset, n_masks, scores_offset in layout:
+                    f.write(self.store.rows[length])
+                    size = (count + 7) // 8
+                    start = masks_offset + n_masks * _CACHE_MASK.size
+                    for k, (position, code, _) in enumerate(by_length[length]):
+                        f.write(_CACHE_MASK.pack(position, code, start + k * size))
+                    for _, _, mask in by_length[length]:
+                        f.write(mask.to_bytes(size, "little"))
+                    if scores_offset:
+                        scores = array("d", self.store.scores[length])
+                        if sys.byteorder == "big":
+                            scores.byteswap()
+                        f.write(scores.tobytes())
+            os.replace(temp, cache_file)
+        except BaseException:
+            os.unlink(temp)
+            raise
+
+    def updated(self, added=(), removed=(), scores=None):
+        """Return an index with words added and removed
+
+        Only the lengths of the changed words are repacked and re-indexed;
+        the rows and masks of every other length are shared with this index.
+        scores maps added words to their score, the words kept keep theirs.
+        """
+        changed = defaultdict(lambda: [set(), set()])
+        for word in added:
+            changed[len(word)][0].add(word)
+        for word in removed:
+            changed[len(word)][1].add(word)
+
+        rows = dict(self.store.rows)
+        row_scores = dict(self.store.scores)
+        for length, (plus, minus) in changed.items():
+            kept = {
+                self.store.word(length, k): self.store.score(length, k)
+                for k in range(self.store.count(length))
+            }
+            words = (set(kept) - minus) | plus
+            rows.pop(length, None)
+            row_scores.pop(length, None)
+            if words:
+                for word in plus:
+                    kept[word] = scores.get(word, 0.0) if scores else 0.0
+                packed = WordStore.from_words(words, kept if (scores or self.store.scores) else None)
+                rows[length] = packed.rows[length]
+                if length in packed.scores:
+                    row_scores[length] = packed.scores[length]
+        store = WordStore(rows, row_scores)
+
+        masks = {key: mask for key, mask in self.masks.items() if key[0] not in changed}
+        masks.update(self.build_masks(WordStore({
+            length: rows[length] for length in changed if length in rows
+        })))
+        return WordIndex(store, masks)
+
+    def full(self, length):
+        """Return the bitset of every word of the given length"""
+        return (1 << self.store.count(length)) - 1
+
+    def mask(self, length, position, letter):
+        """Return the bitset of words with letter at position"""
+        return self.masks.get((length, position, letter), 0)
+
+    def size(self, domain):
+        """Return the number of words in a bitset"""
+        return domain.bit_count()
+
+    def letters(self, length, position, domain):
+        """Return the letters the words in domain place at position"""
+        return [
+            letter for letter in self.letters_at[(length, position)]
+            if domain & self.masks[(length, position, letter)]
+        ]
+
+    def restrict(self, length, position, letters, domain):
+        """Keep only the words in domain with one of letters at position"""
+        allowed = 0
+        for letter in letters:
+            allowed |= self.masks.get((length, position, letter), 0)
+        return domain & allowed
+
+    def match(self, length, crossings, domain):
+        """Keep only the words in domain with every (position, letter) of crossings"""
+        for position, letter in crossings:
+            domain &= self.masks.get((length, position, letter), 0)
+        return domain
+
+    def single(self, length, k):
+        """Return the domain holding only word ID k"""
+        return 1 << k
+
+    def is_empty(self, domain):
+        """Return True if domain holds no word"""
+        return domain == 0
+
+    def has(self, domain, k):
+        """Return True if domain holds word ID k"""
+        return (domain >> k) & 1 == 1
+
+    def discard(self, domain, k):
+        """Return domain without word ID k"""
+        return domain & ~(1 << k)
+
+    def domain_bytes(self, length, domain):
+        """Return domain as ceil(count / 8) little-endian bytes, bit k for word k"""
+        return domain.to_bytes((self.store.count(length) + 7) // 8, "little")
+
+    def word_id(self, word):
+        """Return the ID of word within its length, or None if it is not indexed"""
+        return self.store.find(word)
+
+    def ids(self, domain):
+        """Yield the word IDs in a bitset in ascending order"""
+        bits = bin(domain)[:1:-1]
+        k = bits.find("1")
+        while k != -1:
+            yield k
+            k = bits.find("1", k + 1)
+
+    def decode(self, length, domain):
+        """Return the words in a bitset"""
+        return [self.store.word(length, k) for k in self.ids(domain)]
+
+    def score(self, length, k):
+        """Return the score of word ID k of the given length"""
+        return self.store.score(length, k)
+
+    def as_numpy(self):
+        """Return a NumpyWordIndex over the same store, built once"""
+        if self.numpy_index is None:
+            self.numpy_index = NumpyWordIndex(self.store)
+        return self.numpy_index
+
+    def score_tiers(self, length):
+        """Return the score tiers of a length as (top score, prefix mask) pairs
+
+        Words are ranked by score, best first, and cut into at most
+        SCORE_TIERS runs of equal size. The prefix mask of a run holds that
+        run and every better one, and its top score is the best score in
+        the run.
+        """
+        tiers = self.tiers.get(length)
+        if tiers is None:
+            count = self.store.count(length)
+            order = sorted(range(count), key=lambda k: -self.store.score(length, k))
+            step = max(1, -(-count // SCORE_TIERS))
+            bits = bytearray(b"0" * count)
+            tiers = []
+            for start in range(0, count, step):
+                for k in order[start:start + step]:
+                    bits[count - 1 - k] = ord("1")
+                tiers.append((self.store.score(length, order[start]), int(bits, 2)))
+            self.tiers[length] = tiers
+        return tiers
+
+    def best_score(self, length, domain):
+        """Return an upper bound on the best score of the words in domain
+
+        The bound is the top score of the first tier whose prefix mask
+        meets the domain, found by binary search since the prefix masks
+        are nested. Returns -inf for an empty domain.
+        """
+        if domain == 0:
+            return -math.inf
+        tiers = self.score_tiers(length)
+        lo, hi = 0, len(tiers) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if domain & tiers[mid][1]:
+                hi = mid
+            else:
+                lo = mid + 1
+        return tiers[lo][0]
+
+class NumpyWordIndex:
+    """WordIndex counterpart whose domains are NumPy boolean arrays
+
+    Each length's rows are viewed, without copying, as a uint8 matrix with
+    one row per word and one column per position. A domain is a boolean
+    array over the word IDs of its length, so filtering every candidate
+    of a slot against its crossing letters, or against the letters a
+    neighbor can still place in an AC-3 revise step, is one vectorized
+    comparison of matrix columns. Word IDs and orders are those of
+    WordIndex, so the solver finds the same fills with either index.
+    """
+    vectorized = True
+
+    def __init__(self, store=None):
+        if np is None:
+            raise Exception("The numpy backend needs NumPy installed")
+        self.store = store if store is not None else WordStore()
+        self.matrices = {
+            length: np.frombuffer(self.store.rows[length], dtype=np.uint8).reshape(-1, length)
+            for length in self.store.lengths()
+        }
+        self.scores = {
+            length: np.asarray(scores, dtype=np.float64)
+            for length, scores in self.store.scores.items()
+        }
+
+    def __reduce__(self):
+        return (NumpyWordIndex, (self.store,))
+
+    def matrix(self, length):
+        """Return the word matrix of a length, with no rows if no word has it"""
+        matrix = self.matrices.get(length)
+        if matrix is None:
+            matrix = self.matrices[length] = np.empty((0, length), dtype=np.uint8)
+        return matrix
+
+    def full(self, length):
+        """Return the domain of every word of the given length"""
+        return np.ones(self.store.count(length), dtype=bool)
+
+    def mask(self, length, position, letter):
+        """Return the domain of words with letter at position"""
+        return self.matrix(length)[:, position] == ord(letter)
+
+    def size(self, domain):
+        """Return the number of words in a domain"""
+        return int(np.count_nonzero(domain))
+
+    def letters(self, length, position, domain):
+        """Return the letters the words in domain place at position"""
+        return [chr(code) for code in np.unique(self.matrix(length)[domain, position])]
+
+    def restrict(self, length, position, letters, domain):
+        """Keep only the words in domain with one of letters at position"""
+        codes = np.frombuffer("".join(letters).encode("latin-1"), dtype=np.uint8)
+        return domain & np.isin(self.matrix(length)[:, position], codes)
+
+    def match(self, length, crossings, domain):
+        """Keep only the words in domain with every (position, letter) of crossings"""
+        if not crossings:
+            return domain
+        positions = [position for position, _ in crossings]
+        codes = np.frombuffer("".join(letter for _, letter in crossings).encode("latin-1"), dtype=np.uint8)
+        return domain & (self.matrix(length)[:, positions] == codes).all(axis=1)
+
+    def single(self, length, k):
+        """Return the domain holding only word ID k"""
+        domain = np.zeros(self.store.count(length), dtype=bool)
+        domain[k] = True
+        return domain
+
+    def is_empty(self, domain):
+        """Return True if domain holds no word"""
+        return not domain.any()
+
+    def has(self, domain, k):
+        """Return True if domain holds word ID k"""
+        return bool(domain[k])
+
+    def discard(self, domain, k):
+        """Return domain without word ID k"""
+        domain = domain.copy()
+        domain[k] = False
+        return domain
+
+    def domain_bytes(self, length, domain):
+        """Return domain as ceil(count / 8) little-endian bytes, bit k for word k"""
+        return np.packbits(domain, bitorder="little").tobytes()
+
+    def word_id(self, word):
+        """Return the ID of word within its length, or None if it is not indexed"""
+        return self.store.find(word)
+
+    def ids(self, domain):
+        """Return the word IDs in a domain in ascending order"""
+        return np.flatnonzero(domain).tolist()
+
+    def decode(self, length, domain):
+        """Return the words in a domain"""
+        return [self.store.word(length, k) for k in self.ids(domain)]
+
+    def score(self, length, k):
+        """Return the score of word ID k of the given length"""
+        return self.store.score(length, k)
+
+    def best_score(self, length, domain):
+        """Return the best score of the words in domain, -inf if it is empty"""
+        if not domain.any():
+            return -math.inf
+        scores = self.scores.get(length)
+        return float(scores[domain].max()) if scores is not None else 0.0
+
+class Crossword:
+    def __init__(self, structure_file=None, words_file=None, structure_text=None, words_text=None,
+                 word_index=None):
+        self.height = 0
+        self.width = 0
+        self.structure = []
+        self.variables = set()
+        self.words = WordStore()
+        self.index = WordIndex(self.words)
+        self.overlaps = {}
+        self.cells = {}
+        self.adjacency = {}
+        
+        # Seconds spent in each setup phase
+        self.timings = {}
+        
+        # Load structure
+        started = time.perf_counter()
+        if structure_file:
+            self.load_structure_from_file(structure_file)
+        elif structure_text:
+            self.load_structure_from_text(structure_text)
+        self.timings["structure"] = time.perf_counter() - started
+            
+        # Load words, or share an index that is already loaded
+        started = time.perf_counter()
+        if word_index is not None:
+            self.index = word_index
+            self.words = word_index.store
+        elif words_file:
+            self.load_words_from_file(words_file)
+        elif words_text:
+            self.load_words_from_text(words_text)
+        self.timings["words"] = time.perf_counter() - started
+            
+        # Find variables
+        started = time.perf_counter()
+        self.find_variables()
+        self.timings["find_variables"] = time.perf_counter() - started
+        # Calculate overlaps
+        started = time.perf_counter()
+        self.calculate_overlaps()
+        self.timings["calculate_overlaps"] = time.perf_counter() - started
+    
+    def load_structure_from_file(self, filename):
+        """Load crossword structure from file, line by line"""
+        try:
+            with open_text(filename) as f:
+                self.set_structure(parse_structure(f, filename))
+        except Exception as e:
+            raise Exception(f"Error loading structure file: {e}")
+    
+    def load_structure_from_text(self, content):
+        """Load crossword structure from text"""
+        try:
+            self.set_structure(parse_structure(content.split('\n')))
+        except Exception as e:
+            raise Exception(f"Error parsing structure: {e}")
+    
+    def set_structure(self, rows):
+        """Use rows of True (empty cell) and False (blocked cell) as the structure"""
+        self.structure = rows
+        self.height = len(rows)
+        self.width = len(rows[0]) if rows else 0
+    
+    def load_words_from_file(self, filename):
+        """Load words from file, using its binary cache when up to date"""
+        index = load_word_cache(filename)
+        if index is not None:
+            self.index = index
+            self.words = index.store
+            return
+
+        try:
+            with open_text(filename) as f:
+                self.words = WordStore.from_lines(f)
+                self.index = WordIndex(self.words)
+        except Exception as e:
+            raise Exception(f"Error loading words file: {e}")
+    
+    def load_words_from_text(self, content):
+        """Load words from text"""
+        try:
+            self.words = WordStore.from_lines(content.split('\n'))
+            self.index = WordIndex(self.words)
+        except Exception as e:
+            raise Exception(f"Error parsing words: {e}")
+    
+    def find_variables(self):
+        """Find all possible word positions in the crossword"""
+        self.variables = set()
+        
+        # Find horizontal variables (ACROSS)
+        for i in range(self.height):
+            j = 0
+            while j < self.width:
+                if self.structure[i][j]:
+                    # Start of a potential word
+                    start_j = j
+                    length = 0
+                    while j < self.width and self.structure[i][j]:
+                        length += 1
+                        j += 1
+                    
+                    # Add variable if length >= 2
+                    if length >= 2:
+                        var = Variable(i, start_j, 0, length)  # 0 = ACROSS
+                        self.variables.add(var)
+                else:
+                    j += 1
+        
+        # Find vertical variables (DOWN)
+        for j in range(self.width):
+            i = 0
+            while i < self.height:
+                if self.structure[i][j]:
+                    # Start of a potential word
+                    start_i = i
+                    length = 0
+                    while i < self.height and self.structure[i][j]:
+                        length += 1
+                        i += 1
+                    
+                    # Add variable if length >= 2
+                    if length >= 2:
+                        var = Variable(start_i, j, 1, length)  # 1 = DOWN
+                        self.variables.add(var)
+                else:
+                    i += 1
+    
+    def calculate_overlaps(self):
+        """Calculate overlaps between variables
+
+        Only intersecting pairs are stored: overlaps maps (var1, var2) to
+        the (index in var1, index in var2) of their shared cell, and
+        adjacency maps each variable to {neighbor: overlap}.
+        """
+        # Map each open cell to the variables crossing it
+        self.cells = defaultdict(list)
+        for var in self.variables:
+            for idx, cell in enumerate(var.cells):
+                self.cells[cell].append((var, idx))
+
+        self.overlaps = {}
+        self.adjacency = {var: {} for var in self.variables}
+        for entries in self.cells.values():
+            for var1, idx1 in entries:
+                for var2, idx2 in entries:
+                    if var1 is not var2:
+                        self.overlaps[(var1, var2)] = (idx1, idx2)
+                        self.adjacency[var1][var2] = (idx1, idx2)
+
+    def neighbors(self, var):
+        """Return the variables that share a cell with var, mapped to their overlap"""
+        return self.adjacency[var]
+
+    def components(self):
+        """Return the connected components of the overlap graph as lists of variables
+
+        Components are ordered by their first slot in reading order, so the
+        result does not depend on set iteration order.
+        """
+        seen = set()
+        components = []
+        for var in sorted(self.variables, key=lambda v: (v.i, v.j, v.direction)):
+            if var in seen:
+                continue
+            seen.add(var)
+            component = []
+            stack = [var]
+            while stack:
+                current = stack.pop()
+                component.append(current)
+                for neighbor in self.adjacency[current]:
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        stack.append(neighbor)
+            components.append(component)
+        return components
+
+    def letter_grid(self, assignment):
+        """Return the letters a (possibly partial) assignment places, None on empty cells"""
+        grid = [[None] * self.width for _ in range(self.height)]
+        for variable, word in assignment.items():
+            for idx, (i, j) in enumerate(variable.cells):
+                if 0 <= i < self.height and 0 <= j < self.width:
+                    grid[i][j] = word[idx]
+        return grid
+
+    def word_numbers(self):
+        """Return the clue number of each cell where a word starts, in reading order"""
+        starts = sorted(set(variable.cells[0] for variable in self.variables))
+        return {cell: number for number, cell in enumerate(starts, 1)}
+
+    def derive(self, structure_text=None, word_index=None):
+        """Return a crossword for edited input, reusing this one's slot data
+
+        structure_text and word_index default to this crossword's. Slots
+        the edit leaves in place keep their Variable objects, cell entries
+        and adjacency; only slots crossing edited cells are recomputed.
+        Returns (crossword, changed) where changed holds the variables that
+        are new or have a different position or length.
+        """
+        derived = Crossword(word_index=word_index or self.index)
+
+        started = time.perf_counter()
+        if structure_text is not None:
+            derived.load_structure_from_text(structure_text)
+        else:
+            derived.height, derived.width = self.height, self.width
+            derived.structure = self.structure
+        derived.timings["structure"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        derived.find_variables()
+        derived.timings["find_variables"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        if (derived.height, derived.width) != (self.height, self.width):
+            # Nothing lines up with a resized grid
+            derived.calculate_overlaps()
+            derived.timings["calculate_overlaps"] = time.perf_counter() - started
+            return derived, set(derived.variables)
+
+        # Keep the existing objects of slots that did not move
+        existing = {var: var for var in self.variables}
+        derived.variables = set(existing.get(var, var) for var in derived.variables)
+        added = derived.variables - self.variables
+        removed = self.variables - derived.variables
+
+        # Patch the cell map where slots appeared or disappeared
+        touched = set(cell for var in added | removed for cell in var.cells)
+        derived.cells = defaultdict(list, self.cells)
+        for cell in touched:
+            derived.cells[cell] = [entry for entry in self.cells.get(cell, ()) if entry[0] not in removed]
+        for var in added:
+            for idx, cell in enumerate(var.cells):
+                derived.cells[cell].append((var, idx))
+        for cell in touched:
+            if not derived.cells[cell]:
+                del derived.cells[cell]
+
+        # Recompute adjacency only for slots crossing a touched cell
+        dirty = set(added)
+        for cell in touched:
+            for var, _ in derived.cells.get(cell, ()):
+                dirty.add(var)
+        derived.adjacency = {var: self.adjacency[var] for var in derived.variables if var not in dirty}
+        for var in dirty:
+            derived.adjacency[var] = {
+                other: (idx, other_idx)
+                for idx, cell in enumerate(var.cells)
+                for other, other_idx in derived.cells[cell]
+                if other is not var
+            }
+        derived.overlaps = {
+            (var, other): overlap
+            for var, neighbors in derived.adjacency.items()
+            for other, overlap in neighbors.items()
+        }
+        derived.timings["calculate_overlaps"] = time.perf_counter() - started
+        return derived, added
+
+def parse_word_line(line):
+    """Return (word, score) for a word list line, or None if it holds no word
+
+    A line holds a word, optionally followed by a numeric score (e.g. a
+    frequency or familiarity rating); the word is upper-cased and the
+    score is None when missing.
+    """
+    fields = line.split()
+    if not fields or len(fields) > 2:
+        return None
+    word = fields[0].upper()
+    if not word.isalpha():
+        return None
+    score = None
+    if len(fields) == 2:
+        try:
+            score = float(fields[1])
+        except ValueError:
+            return None
+        if not math.isfinite(score):
+            return None
+    return word, score
+
+def parse_words(content):
+    """Return the normalized words in word list text, mapped to their score or None
+
+    content is a string or an iterable of lines.
+    """
+    lines = content.split('\n') if isinstance(content, str) else content
+    words = {}
+    for line in lines:
+        entry = parse_word_line(line)
+        if entry is not None:
+            words[entry[0]] = entry[1]
+    return words
+
+def parse_structure(lines, source=None):
+    """Return the rows of a structure as lists of True (_, open) and False (#, blocked)
+
+    lines is read one at a time. Blank lines before and after the grid are
+    ignored. A blank line inside it, any other character or a row whose
+    length differs from the first row raises an Exception naming source,
+    the line and the column.
+    """
+    where = f"{source}, " if source else ""
+    rows = []
+    first = None
+    blank = None
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip()
+        if not line:
+            if rows and blank is None:
+                blank = number
+            continue
+        if blank is not None:
+            raise Exception(f"{where}line {blank}: empty row inside the grid")
+        if line.strip("_#"):
+            column = next(k for k, char in enumerate(line, 1) if char not in "_#")
+            raise Exception(f"{where}line {number}, column {column}: "
+                            f"unexpected {line[column - 1]!r}, expected '_' or '#'")
+        if rows and len(line) != len(rows[0]):
+            raise Exception(f"{where}line {number}: row has {len(line)} cells, "
+                            f"line {first} has {len(rows[0])}")
+        if first is None:
+            first = number
+        rows.append([char == "_" for char in line])
+    return rows
+
+def split_archive_path(path):
+    """Return (zip file, member) for a path into a zip file, or (None, None)
+
+    A zip file given alone has member None.
+    """
+    if os.path.isfile(path):
+        if path.lower().endswith(".zip") and zipfile.is_zipfile(path):
+            return path, None
+        return None, None
+    lowered = path.lower()
+    start = 0
+    while True:
+        k = lowered.find(".zip", start)
+        if k == -1:
+            return None, None
+        archive = path[:k + 4]
+        if path[k + 4:k + 5] in ("/", os.sep) and os.path.isfile(archive):
+            return archive, path[k + 5:].replace(os.sep, "/")
+        start = k + 4
+
+def source_file(path):
+    """Return the file on disk holding path, the zip file for an archive member"""
+    archive, _ = split_archive_path(path)
+    return archive or path
+
+def open_text(path):
+    """Open a text file to read line by line, also from gzip and zip files
+
+    path may name a plain file, a .gz file, a .zip file holding a single
+    file, or a file inside a zip file as a path through it, e.g.
+    data.zip/data/words2.txt. Nothing is extracted to disk.
+    """
+    archive, member = split_archive_path(path)
+    if archive is not None:
+        with zipfile.ZipFile(archive) as zf:
+            if member is None:
+                names = [name for name in zf.namelist() if not name.endswith("/")]
+                if len(names) != 1:
+                    raise Exception(f"{path} holds {len(names)} files, name one as {path}/<file>")
+                member = names[0]
+            # The member keeps the archive file open after zf is closed
+            return io.TextIOWrapper(zf.open(member))
+    if path.lower().endswith(".gz"):
+        return gzip.open(path, "rt")
+    return open(path, "r")
+
+def word_cache_path(words_file):
+    """Return the binary cache file used for a words file"""
+    archive, member = split_archive_path(words_file)
+    if member is not None:
+        # Next to the archive, as members cannot be written to
+        return f"{archive}.{member.replace('/', '_')}.cache"
+    return words_file + ".cache"
+
+def build_word_cache(words_file, cache_file=None):
+    """Parse a words file and write its binary cache, return the cache path"""
+    cache_file = cache_file or word_cache_path(words_file)
+    with open_text(words_file) as f:
+        index = WordIndex(WordStore.from_lines(f))
+    stat = os.stat(source_file(words_file))
+    index.save(cache_file, stat.st_size, stat.st_mtime_ns)
+    return cache_file
+
+def load_word_cache(words_file, cache_file=None):
+    """Return the cached WordIndex of a words file, or None if missing or stale"""
+    cache_file = cache_file or word_cache_path(words_file)
+    try:
+        stat = os.stat(source_file(words_file))
+        with open(cache_file, "rb") as f:
+            header = f.read(_CACHE_HEADER.size)
+    except OSError:
+        return None
+    if len(header) < _CACHE_HEADER.size:
+        return None
+
+    magic, version, size, mtime, _ = _CACHE_HEADER.unpack(header)
+    if (magic, version) != (WORD_CACHE_MAGIC, WORD_CACHE_VERSION):
+        return None
+    if (size, mtime) != (stat.st_size, stat.st_mtime_ns):
+        return None
+    return WordIndex.from_cache(cache_file)
+
+# Search orders accepted by CrosswordCreator.solve()
+STRATEGIES = ("first", "mrv", "mrv-lcv")
+
+# Domain representations accepted by CrosswordCreator: int bitsets over a
+# WordIndex, or boolean arrays over a NumpyWordIndex
+BACKENDS = ("bitset", "numpy")
+
+def luby(i):
+    """Return term i (from 1) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, ..."""
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while i != (1 << k) - 1:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+class NogoodStore:
+    """Letter patterns that no solution of a grid can contain
+
+    A nogood is a frozenset of (cell, letter) pairs. Without an
+    all-different constraint, a failed subtree depends only on the letters
+    its assigned words place on cells crossing unassigned slots, so that
+    boundary pattern can never be part of a solution, whatever branch or
+    restart reaches it again. Patterns larger than max_size cells are not
+    kept, and at most limit patterns are stored.
+    """
+    def __init__(self, max_size=8, limit=100000):
+        self.max_size = max_size
+        self.limit = limit
+        self.patterns = set()
+        self.by_pair = defaultdict(list)
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def add(self, pattern):
+        """Record a pattern, return True if it was new and small enough to keep"""
+        if not pattern or len(pattern) > self.max_size or len(self.patterns) >= self.limit:
+            return False
+        if pattern in self.patterns:
+            return False
+        self.patterns.add(pattern)
+        for pair in pattern:
+            self.by_pair[pair].append(pattern)
+        return True
+
+    def matches(self, cells, letter_at):
+        """Return a nogood that holds once the given (cell, letter) pairs are placed, or None
+
+        letter_at(cell) returns the letter currently on a cell, or None.
+        Only nogoods containing one of the new pairs are checked; any other
+        match would have been caught when its last pair was placed.
+        """
+        for pair in cells:
+            for pattern in self.by_pair.get(pair, ()):
+                if all(letter_at(cell) == letter for cell, letter in pattern):
+                    return pattern
+        return None
+
+class SolverStats:
+    """Search counters and phase timings of a CrosswordCreator
+
+    Counters are updated by the solving thread and can be read from
+    another one, e.g. the GUI, while a solve is running. timings holds
+    seconds per phase: the Crossword setup phases (structure, words,
+    find_variables, calculate_overlaps), then domains, preprocess and
+    search.
+    """
+    def __init__(self):
+        self.nodes = 0
+        # Checks against the assignment: one domain filter per search node
+        # (consistent_domain()), plus one per word backjumping tries
+        self.consistent_calls = 0
+        self.backtracks = 0
+        self.depth = 0
+        self.max_depth = 0
+        self.runs = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # Number of domain values removed by each pruning stage
+        self.pruned = {"node": 0, "ac3": 0, "forward": 0, "mac": 0, "nogood": 0, "distinct": 0,
+                       "bound": 0}
+        self.timings = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Add the time spent in the with block to timings[name]"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    def to_dict(self):
+        """Return a JSON-serializable snapshot"""
+        return {
+            "nodes": self.nodes,
+            "consistent_calls": self.consistent_calls,
+            "backtracks": self.backtracks,
+            "max_depth": self.max_depth,
+            "runs": self.runs,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "pruned": dict(self.pruned),
+            "timings": dict(self.timings),
+        }
+
+    def export(self, filename):
+        """Write the snapshot to a JSON file"""
+        with open(filename, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def merge(self, other):
+        """Add the search counters of another solve, e.g. of one grid component"""
+        self.nodes += other.nodes
+        self.consistent_calls += other.consistent_calls
+        self.backtracks += other.backtracks
+        self.runs += other.runs
+        self.max_depth = max(self.max_depth, other.max_depth)
+        for stage, count in other.pruned.items():
+            self.pruned[stage] = self.pruned.get(stage, 0) + count
+
+class SolutionCache:
+    """Solutions of grid components, keyed by CrosswordCreator.component_key()
+
+    A value is the list of words of a component in its canonical slot
+    order, or None when the component was proven unsatisfiable. At most
+    max_entries are kept, least recently used first out. With a path the
+    cache is loaded from that JSON file and save() writes it back,
+    merging entries other processes saved in the meantime.
+    """
+    def __init__(self, max_entries=4096, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            self.load()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def lookup(self, key):
+        """Return (found, words) for key, marking it recently used"""
+        if key not in self.entries:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return True, self.entries[key]
+
+    def put(self, key, words):
+        """Store the words of a component, or None if it has no solution"""
+        self.entries[key] = list(words) if words is not None else None
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def load(self, path=None):
+        """Add the entries of a saved cache file, keeping newer ones in memory"""
+        with open(path or self.path) as f:
+            data = json.load(f)
+        if data.get("version") != 1:
+            raise Exception(f"Not a solution cache file: {path or self.path}")
+        saved = OrderedDict((key, words) for key, words in data["entries"])
+        saved.update(self.entries)
+        self.entries = saved
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def save(self, path=None):
+        """Write the cache to path (default: self.path) atomically"""
+        path = path or self.path
+        if path is None:
+            raise Exception("No path to save the solution cache to")
+        if os.path.exists(path):
+            try:
+                self.load(path)
+            except (ValueError, KeyError):
+                pass  # Corrupt file, overwrite it
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"version": 1, "entries": list(self.entries.items())}, f)
+            os.replace(temp, path)
+        except BaseException:
+            os.unlink(temp)
+            raise
+
+class SearchInterrupted(Exception):
+    """Raised inside the search when it is cancelled or runs out of time"""
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+class CrosswordCreator:
+    def __init__(self, crossword, cancel_event=None, variables=None, backend="bitset"):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+        self.crossword = crossword
+        self.backend = backend
+        # The slots to fill, by default all of them; a subset must be
+        # closed under neighbors, e.g. one of crossword.components()
+        self.variables = set(variables) if variables is not None else crossword.variables
+        self.domains = {}
+        self.inference = "forward"
+        self.strategy = "mrv"
+        self.rng = None
+
+        # Search control, safe to set from another thread
+        self.cancel_event = cancel_event or threading.Event()
+        self.deadline = None
+        self.status = None
+        self.winner = None
+
+        # Restart schedule and learned nogoods, kept across runs
+        self.restarts = None
+        self.restart_base = 100
+        self.restart_growth = 1.5
+        self.cutoff = None
+        self.nogoods = None
+        # Snapshot of the domains the nogoods were learned under
+        self.nogood_domains = None
+
+        # Conflict-directed backjumping state: for each unassigned variable,
+        # the assigned variables whose forward checking pruned its domain
+        self.backjumping = False
+        self.fc_conflicts = defaultdict(set)
+
+        # Progress counters and timings, plus callbacks fired on
+        # assign/unassign events (see add_hook)
+        self.stats = SolverStats()
+        self.stats.timings.update(crossword.timings)
+        self.hooks = []
+
+        # Domains are sets of word IDs in the crossword's word index, as
+        # bitsets or, with the numpy backend, boolean arrays
+        with self.stats.phase("domains"):
+            self.index = crossword.index if backend == "bitset" else crossword.index.as_numpy()
+            for variable in self.variables:
+                self.domains[variable] = self.index.full(variable.length)
+
+        # Slots that could take the same word, for all-different fills
+        self.same_length = defaultdict(list)
+        for variable in self.variables:
+            self.same_length[variable.length].append(variable)
+
+    def solve(self, inference="forward", strategy="mrv", timeout=None, seed=None, portfolio=None,
+              restarts=None, restart_base=100, restart_growth=1.5, learn=False, backjumping=False,
+              decompose=False, cache=None, jobs=None):
+        """Solve the crossword using backtracking
+
+        inference selects the pruning done after each assignment:
+        None (plain backtracking), "forward" (forward checking) or
+        "mac" (maintain arc consistency).
+
+        strategy selects the search order: "first" (first unassigned
+        variable, domain order), "mrv" (minimum remaining values with
+        degree tie-breaking) or "mrv-lcv" (MRV plus least constraining
+        value ordering of words).
+
+        timeout is a time budget in seconds. When it runs out, or cancel()
+        is called, the search stops and None is returned; status then
+        tells "timeout" or "cancelled" apart from "unsatisfiable".
+
+        seed makes variable and value ties break at random, reproducibly.
+
+        restarts="luby" or "geometric" cuts each run off after a number of
+        backtracks following that schedule (restart_base times the Luby
+        term, or restart_base * restart_growth ** run) and starts over
+        with fresh random tie-breaking; the seed defaults to 0 so timings
+        are reproducible. With learn=True, failed subtrees are recorded as
+        letter-pattern nogoods in self.nogoods and pruned in later runs.
+
+        backjumping=True uses conflict-directed backjumping (see backjump())
+        instead of chronological backtracking, and always learns nogoods.
+        It supports inference None or "forward".
+
+        portfolio=N races N worker processes, each with a different
+        configuration from portfolio_configs(), and returns the first
+        solution found; the other workers are then terminated.
+
+        decompose=True solves each connected component of the overlap
+        graph on its own (see solve_components()), in jobs worker
+        processes if jobs > 1. Passing a SolutionCache as cache implies
+        decompose and reuses the solutions of components seen before.
+        """
+        if decompose or cache is not None:
+            options = dict(inference=inference, strategy=strategy, seed=seed, portfolio=portfolio,
+                           restarts=restarts, restart_base=restart_base,
+                           restart_growth=restart_growth, learn=learn, backjumping=backjumping)
+            return self.solve_components(options, timeout=timeout, cache=cache, jobs=jobs)
+
+        if portfolio:
+            return self.solve_portfolio(portfolio, timeout=timeout, seed=seed)
+
+        if inference not in (None, "forward", "mac"):
+            raise ValueError(f"Unknown inference mode: {inference}")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown search strategy: {strategy}")
+        if restarts not in (None, "luby", "geometric"):
+            raise ValueError(f"Unknown restart schedule: {restarts}")
+        if backjumping and inference == "mac":
+            raise ValueError("Backjumping supports inference None or 'forward'")
+        if restarts and seed is None:
+            seed = 0
+        self.inference = inference
+        self.strategy = strategy
+        self.rng = random.Random(seed) if seed is not None else None
+        self.restarts = restarts
+        self.restart_base = restart_base
+        self.restart_growth = restart_growth
+        self.backjumping = backjumping
+        if self.nogoods is not None and self.nogood_domains != self.domain_snapshot():
+            # Nogoods learned under other domains may rule out valid fills
+            self.nogoods = None
+        if (learn or backjumping) and self.nogoods is None:
+            self.nogoods = NogoodStore()
+            self.nogood_domains = self.domain_snapshot()
+
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+
+        with self.stats.phase("preprocess"):
+            self.stats.pruned["node"] += self.enforce_node_consistency()
+            consistent = self.ac3()
+        if not consistent:
+            self.status = "unsatisfiable"
+            return None
+
+        assignment = {}
+        domains = dict(self.domains)
+        try:
+            with self.stats.phase("search"):
+                solved = self.search(assignment)
+        except SearchInterrupted as e:
+            # Unwinding skipped the restores, put the domains back
+            self.domains = domains
+            self.status = e.reason
+            return None
+        finally:
+            self.stats.depth = len(assignment)
+
+        if solved:
+            self.status = "solved"
+            return assignment
+        self.status = "unsatisfiable"
+        return None
+
+    def domain_snapshot(self):
+        """Return the domains as bytes, which compare by value on every backend"""
+        return {
+            var: self.index.domain_bytes(var.length, domain)
+            for var, domain in self.domains.items()
+        }
+
+    def search(self, assignment):
+        """Run the search, restarting it on the configured cutoff schedule"""
+        if self.restarts is None:
+            return self.run(assignment)
+
+        while True:
+            self.stats.runs += 1
+            if self.restarts == "luby":
+                limit = self.restart_base * luby(self.stats.runs)
+            else:
+                limit = int(self.restart_base * self.restart_growth ** (self.stats.runs - 1))
+            self.cutoff = self.stats.backtracks + limit
+
+            domains = dict(self.domains)
+            try:
+                return self.run(assignment)
+            except SearchInterrupted as e:
+                if e.reason != "restart":
+                    raise
+                self.domains = domains
+                assignment.clear()
+            finally:
+                self.cutoff = None
+
+    def run(self, assignment):
+        """Run one complete search from assignment"""
+        if self.backjumping:
+            self.fc_conflicts = defaultdict(set)
+            return self.backjump(assignment)[0]
+        return self.backtrack(assignment)
+
+    def iter_solutions(self, limit=None, min_distance=1, inference="forward", strategy="mrv",
+                       timeout=None, seed=None):
+        """Lazily yield distinct fills that never use a word twice
+
+        The search keeps its place between yields: each next() resumes the
+        backtracking where the previous solution was found. Every fill
+        differs from each one yielded before in at least min_distance
+        slots; subtrees that already agree with an earlier fill on too many
+        slots to reach that distance are skipped. At most limit fills are
+        yielded. timeout covers the whole iteration.
+
+        inference, strategy and seed are as for solve(); restarts,
+        nogoods and backjumping are not used, since the all-different
+        constraint makes a failure depend on more than the letters on the
+        cells around it. When the generator finishes, status is "solved"
+        if it yielded a fill, "unsatisfiable" if there was none, or
+        "timeout"/"cancelled".
+        """
+        if inference not in (None, "forward", "mac"):
+            raise ValueError(f"Unknown inference mode: {inference}")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown search strategy: {strategy}")
+        self.inference = inference
+        self.strategy = strategy
+        self.rng = random.Random(seed) if seed is not None else None
+        self.nogoods = None
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+
+        with self.stats.phase("preprocess"):
+            self.stats.pruned["node"] += self.enforce_node_consistency()
+            consistent = self.ac3()
+        if not consistent:
+            self.status = "unsatisfiable"
+            return
+
+        found = []
+        domains = dict(self.domains)
+        self.status = None
+        try:
+            for assignment in self.distinct_solutions({}, found, min_distance):
+                solution = dict(assignment)
+                found.append(solution)
+                yield dict(solution)
+                if limit is not None and len(found) >= limit:
+                    break
+            self.status = "solved" if found else "unsatisfiable"
+        except SearchInterrupted as e:
+            self.status = e.reason
+        finally:
+            # Also reached when the caller stops iterating early
+            self.domains = domains
+
+    def distinct_solutions(self, assignment, found, min_distance):
+        """Backtracking search yielding every all-different fill far enough from found"""
+        if min_distance > 1 and self.too_close(assignment, found, min_distance):
+            return
+        if len(assignment) == len(self.variables):
+            yield assignment
+            return
+        self.enter_node(assignment)
+
+        var = self.select_unassigned_variable(assignment)
+        for word in self.consistent_values(var, assignment):
+            assignment[var] = word
+            k = self.index.word_id(word)
+            saved = {var: self.domains[var]}
+            self.domains[var] = self.index.single(var.length, k)
+            if self.hooks:
+                self.emit("assign", var, word, assignment)
+
+            if self.exclude_word(var, k, assignment, saved) and self.infer(var, assignment, saved):
+                yield from self.distinct_solutions(assignment, found, min_distance)
+
+            if self.hooks:
+                self.emit("unassign", var, word, assignment)
+            self.restore(saved)
+            del assignment[var]
+            self.stats.backtracks += 1
+
+    def exclude_word(self, var, k, assignment, saved):
+        """Remove word ID k from the other unassigned slots of var's length
+
+        Returns False when that leaves one of them without words.
+        """
+        for other in self.same_length[var.length]:
+            if other in assignment:
+                continue
+            domain = self.domains[other]
+            if self.index.has(domain, k):
+                if other not in saved:
+                    saved[other] = domain
+                self.domains[other] = self.index.discard(domain, k)
+                self.stats.pruned["distinct"] += 1
+                if self.index.is_empty(self.domains[other]):
+                    return False
+        return True
+
+    def too_close(self, assignment, found, min_distance):
+        """Return True if every completion of assignment is within min_distance of a found fill"""
+        unassigned = len(self.variables) - len(assignment)
+        for solution in found:
+            differing = sum(1 for var, word in assignment.items() if solution[var] != word)
+            if differing + unassigned < min_distance:
+                return True
+        return False
+
+    def optimize(self, timeout=None, inference="forward", strategy="mrv", distinct=False,
+                 on_improve=None):
+        """Find the fill with the highest total word score by branch and bound
+
+        Words are tried best score first, and a subtree is cut off when its
+        score so far plus an upper bound on each unassigned slot's best
+        word (see WordIndex.best_score()) cannot beat the best fill found.
+        distinct=True never uses a word twice. on_improve(assignment, score)
+        is called on the solving thread with each better fill.
+
+        This is an anytime search: when timeout runs out or cancel() is
+        called, the best fill found so far is returned with status
+        "solved", or None with status "timeout"/"cancelled" if there is
+        none yet. A search that completes sets status "optimal", or
+        "unsatisfiable". The best score is kept in self.best_score.
+        """
+        if inference not in (None, "forward", "mac"):
+            raise ValueError(f"Unknown inference mode: {inference}")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown search strategy: {strategy}")
+        self.inference = inference
+        self.strategy = strategy
+        self.rng = None
+        self.nogoods = None
+        self.distinct = distinct
+        self.on_improve = on_improve
+        self.best = None
+        self.best_score = -math.inf
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+
+        with self.stats.phase("preprocess"):
+            self.stats.pruned["node"] += self.enforce_node_consistency()
+            consistent = self.ac3()
+        if not consistent:
+            self.status = "unsatisfiable"
+            return None
+
+        domains = dict(self.domains)
+        try:
+            with self.stats.phase("search"):
+                self.branch_and_bound({}, 0.0)
+            self.status = "optimal" if self.best is not None else "unsatisfiable"
+        except SearchInterrupted as e:
+            self.domains = domains
+            self.status = "solved" if self.best is not None else e.reason
+        return dict(self.best) if self.best is not None else None
+
+    def branch_and_bound(self, assignment, score):
+        """Depth-first search for fills scoring above self.best_score"""
+        if len(assignment) == len(self.variables):
+            if score > self.best_score:
+                self.best = dict(assignment)
+                self.best_score = score
+                if self.on_improve:
+                    self.on_improve(dict(assignment), score)
+            return
+        self.enter_node(assignment)
+
+        var = self.select_unassigned_variable(assignment)
+
+        # What the other unassigned slots can add at most
+        rest = 0.0
+        for other in self.variables:
+            if other is not var and other not in assignment:
+                rest += self.index.best_score(other.length, self.domains[other])
+
+        ids = list(self.index.ids(self.consistent_domain(var, assignment)))
+        ids.sort(key=lambda k: -self.index.score(var.length, k))
+        for k in ids:
+            word_score = self.index.score(var.length, k)
+            if score + word_score + rest <= self.best_score:
+                # Every remaining word scores lower still
+                self.stats.pruned["bound"] += 1
+                break
+            word = self.index.store.word(var.length, k)
+            assignment[var] = word
+            saved = {var: self.domains[var]}
+            self.domains[var] = self.index.single(var.length, k)
+            if self.hooks:
+                self.emit("assign", var, word, assignment)
+
+            if (not self.distinct or self.exclude_word(var, k, assignment, saved)) \
+                    and self.infer(var, assignment, saved):
+                self.branch_and_bound(assignment, score + word_score)
+
+            if self.hooks:
+                self.emit("unassign", var, word, assignment)
+            self.restore(saved)
+            del assignment[var]
+            self.stats.backtracks += 1
+
+    def solve_portfolio(self, workers, timeout=None, seed=None):
+        """Race worker processes with different search configurations"""
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        context = multiprocessing.get_context()
+        results = context.Queue()
+        processes = [
+            context.Process(target=_portfolio_worker,
+                            args=(self.crossword, config, timeout, results, self.backend),
+                            daemon=True)
+            for config in portfolio_configs(workers, seed)
+        ]
+        for process in processes:
+            process.start()
+
+        statuses = []
+        try:
+            while len(statuses) < len(processes):
+                self.check_interrupt()
+                try:
+                    config, status, assignment, stats = results.get(timeout=0.1)
+                except queue.Empty:
+                    if not any(process.is_alive() for process in processes) and results.empty():
+                        # Workers died without reporting
+                        statuses.append("error")
+                        break
+                    continue
+
+                statuses.append(status)
+                if status == "error":
+                    raise Exception(f"Portfolio worker failed: {assignment}")
+                if status == "solved":
+                    self.status = "solved"
+                    self.winner = config
+                    # Report the winner's search, keeping the setup timings
+                    for name, seconds in self.stats.timings.items():
+                        stats.timings.setdefault(name, seconds)
+                    self.stats = stats
+                    return assignment
+        except SearchInterrupted as e:
+            self.status = e.reason
+            return None
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+        # A complete search that fails proves the grid unsolvable
+        if "unsatisfiable" in statuses:
+            self.status = "unsatisfiable"
+        elif "timeout" in statuses:
+            self.status = "timeout"
+        else:
+            self.status = "error"
+        return None
+
+    def component_key(self, component):
+        """Return (slots, key) identifying a component up to position and transposition
+
+        slots lists the component's variables in canonical order. key
+        hashes their shape relative to the component's top-left corner,
+        taking the smaller of the grid and its transpose, the domains that
+        are narrower than a full word list (e.g. words locked by repair()),
+        and the word list itself. Components with equal keys have the same
+        solutions, word for word in slot order.
+        """
+        best = None
+        for transpose in (False, True):
+            placed = []
+            for var in component:
+                if transpose:
+                    placed.append(((var.j, var.i, 1 - var.direction, var.length), var))
+                else:
+                    placed.append(((var.i, var.j, var.direction, var.length), var))
+            top = min(shape[0] for shape, _ in placed)
+            left = min(shape[1] for shape, _ in placed)
+            placed = sorted(
+                (((i - top, j - left, direction, length), var) for (i, j, direction, length), var in placed),
+                key=lambda item: item[0]
+            )
+            shape = tuple(item[0] for item in placed)
+            if best is None or shape < best[0]:
+                best = (shape, [var for _, var in placed])
+        shape, slots = best
+
+        constraints = []
+        for k, var in enumerate(slots):
+            domain = self.domains[var]
+            if self.index.size(domain) != self.index.store.count(var.length):
+                data = self.index.domain_bytes(var.length, domain)
+                constraints.append((k, hashlib.sha1(data).hexdigest()))
+
+        key = hashlib.sha1(
+            repr((shape, constraints, self.index.store.digest())).encode("ascii")
+        ).hexdigest()
+        return slots, key
+
+    def solve_components(self, options, timeout=None, cache=None, jobs=None):
+        """Solve each connected component of the overlap graph on its own
+
+        Components share no cell, so the grid is solved when each of them
+        is, and unsatisfiable as soon as one of them is. options are
+        solve() keyword arguments used for every component. Solutions and
+        failures are looked up in and added to cache, a SolutionCache,
+        which is saved afterwards if it has a path. With jobs > 1, the
+        components not in the cache are solved in that many processes.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        self.deadline = deadline
+        assignment = {}
+        pending = []
+        for component in self.crossword.components():
+            if not self.variables.issuperset(component):
+                continue
+            slots, key = self.component_key(component) if cache is not None else (component, None)
+            if cache is not None:
+                found, words = cache.lookup(key)
+                if found:
+                    self.stats.cache_hits += 1
+                    if words is None:
+                        self.status = "unsatisfiable"
+                        return None
+                    assignment.update(zip(slots, words))
+                    continue
+                self.stats.cache_misses += 1
+            pending.append((slots, key))
+
+        self.status = "solved"
+        try:
+            with self.stats.phase("search"):
+                if jobs and jobs > 1 and len(pending) > 1:
+                    solved = self.solve_components_parallel(pending, options, deadline, jobs, cache,
+                                                            assignment)
+                else:
+                    solved = self.solve_components_serial(pending, options, deadline, cache,
+                                                          assignment)
+        finally:
+            if cache is not None and cache.path:
+                cache.save()
+        self.stats.depth = len(assignment)
+        return assignment if solved else None
+
+    def solve_components_serial(self, pending, options, deadline, cache, assignment):
+        """Solve pending (slots, key) components one after another in this process"""
+        for slots, key in pending:
+            sub = CrosswordCreator(self.crossword, cancel_event=self.cancel_event, variables=slots,
+                                   backend=self.backend)
+            sub.domains = {var: self.domains[var] for var in slots}
+            sub.hooks = self.hooks
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            result = sub.solve(timeout=remaining, **options)
+            self.stats.merge(sub.stats)
+            if not self.record_component(slots, key, result, sub.status, cache, assignment):
+                return False
+        return True
+
+    def solve_components_parallel(self, pending, options, deadline, jobs, cache, assignment):
+        """Solve pending (slots, key) components in a pool of jobs processes"""
+        context = multiprocessing.get_context()
+        pool = context.Pool(min(jobs, len(pending)), initializer=_init_component_worker,
+                            initargs=(self.crossword, self.backend))
+        try:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            waiting = [
+                (pool.apply_async(_solve_component_job,
+                                  (slots, {var: self.domains[var] for var in slots}, options, remaining)),
+                 slots, key)
+                for slots, key in pending
+            ]
+            while waiting:
+                done = [job for job in waiting if job[0].ready()]
+                if not done:
+                    if self.cancel_event.is_set():
+                        self.status = "cancelled"
+                        return False
+                    time.sleep(0.01)
+                    continue
+                for job in done:
+                    waiting.remove(job)
+                    future, slots, key = job
+                    result, status, stats = future.get()
+                    if stats is not None:
+                        self.stats.merge(stats)
+                    if status == "error":
+                        raise Exception(f"Component worker failed: {result}")
+                    if not self.record_component(slots, key, result, status, cache, assignment):
+                        return False
+            return True
+        finally:
+            # Stop the workers still busy with a grid that already failed
+            pool.terminate()
+            pool.join()
+
+    def record_component(self, slots, key, result, status, cache, assignment):
+        """Merge one component's result, return False if the grid cannot be solved"""
+        if result is None:
+            self.status = status
+            if cache is not None and status == "unsatisfiable":
+                cache.put(key, None)
+            return False
+        assignment.update(result)
+        if cache is not None:
+            cache.put(key, [result[var] for var in slots])
+        return True
+
+    def repair(self, previous, changed=(), timeout=None, **options):
+        """Warm-start from a previous assignment, re-solving only what changed
+
+        Words of previous that still fit (their slot exists, is not in
+        changed, the word is still in the list and agrees with its kept
+        neighbors) are locked in, and solve() fills the remaining slots.
+        If that fails, the ring of slots around the unlocked region is
+        unlocked too and the search retried, until nothing is locked.
+        Other keyword arguments are passed on to solve().
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        base = dict(self.domains)
+
+        keep = {}
+        for var, word in previous.items():
+            if var in base and var not in changed and self.index.word_id(word) is not None:
+                if all(keep.get(other, word[i])[j] == word[i] if other in keep else True
+                       for other, (i, j) in self.crossword.neighbors(var).items()):
+                    keep[var] = word
+        free = set(base) - set(keep)
+
+        while True:
+            # Nogoods learned while other slots were locked do not hold here
+            self.nogoods = None
+            self.domains = dict(base)
+            for var, word in keep.items():
+                if var not in free:
+                    self.domains[var] = self.index.single(var.length, self.index.word_id(word))
+
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            assignment = self.solve(timeout=remaining, **options)
+            if assignment is not None or self.status in ("timeout", "cancelled"):
+                return assignment
+
+            # Unlock the slots crossing the region that could not be filled
+            ring = set(
+                neighbor for var in free for neighbor in self.crossword.neighbors(var)
+            ) - free
+            if not ring:
+                return None
+            free |= ring
+
+    def cancel(self):
+        """Ask a running solve to stop, may be called from another thread"""
+        self.cancel_event.set()
+
+    def add_hook(self, callback):
+        """Call callback(event, var, word, depth) on every "assign" and "unassign"
+
+        Hooks run on the solving thread, inside the search loop, so they
+        should be quick. Portfolio workers run in other processes and do
+        not fire them.
+        """
+        self.hooks.append(callback)
+
+    def remove_hook(self, callback):
+        """Stop calling a hook added with add_hook"""
+        self.hooks.remove(callback)
+
+    def emit(self, event, var, word, assignment):
+        """Fire the hooks for a search event"""
+        depth = len(assignment)
+        for callback in self.hooks:
+            callback(event, var, word, depth)
+
+    def enter_node(self, assignment):
+        """Count a search node and check for interruption"""
+        stats = self.stats
+        stats.nodes += 1
+        stats.depth = len(assignment)
+        if stats.depth > stats.max_depth:
+            stats.max_depth = stats.depth
+        self.check_interrupt()
+
+    def check_interrupt(self):
+        """Raise SearchInterrupted if the solve was cancelled or is out of time"""
+        if self.cancel_event.is_set():
+            raise SearchInterrupted("cancelled")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise SearchInterrupted("timeout")
+        if self.cutoff is not None and self.stats.backtracks >= self.cutoff:
+            raise SearchInterrupted("restart")
+
+    def enforce_node_consistency(self):
+        """Remove values that do not fit their variable's length, return count removed"""
+        removed = 0
+        for var, domain in self.domains.items():
+            kept = domain & self.index.full(var.length)
+            removed += self.index.size(domain) - self.index.size(kept)
+            self.domains[var] = kept
+        return removed
+
+    def revise(self, x, y, saved=None):
+        """Make x arc consistent with y, return number of values removed from x
+
+        When saved is given, the domain x had before its first revision is
+        recorded there so the caller can restore it on backtrack.
+        """
+        overlap = self.crossword.overlaps.get((x, y))
+        if not overlap:
+            return 0
+        i, j = overlap
+
+        # Keep the words of x whose letter on the shared cell y can still place
+        supported = self.index.letters(y.length, j, self.domains[y])
+        domain = self.domains[x]
+        kept = self.index.restrict(x.length, i, supported, domain)
+
+        removed = self.index.size(domain) - self.index.size(kept)
+        if removed:
+            if saved is not None and x not in saved:
+                saved[x] = domain
+            self.domains[x] = kept
+        return removed
+
+    def ac3(self, arcs=None, saved=None, stage="ac3"):
+        """Enforce arc consistency, return False if a domain becomes empty
+
+        Starts from every arc when arcs is None. Removed values are counted
+        in self.stats.pruned[stage].
+        """
+        if arcs is None:
+            arcs = [
+                (x, y) for x in self.variables
+                for y in self.crossword.neighbors(x)
+            ]
+        # Arcs waiting to be revised, each queued at most once
+        pending = deque()
+        queued = set()
+        for arc in arcs:
+            if arc not in queued:
+                queued.add(arc)
+                pending.append(arc)
+
+        while pending:
+            arc = pending.popleft()
+            queued.discard(arc)
+            x, y = arc
+            removed = self.revise(x, y, saved)
+            if removed:
+                self.stats.pruned[stage] += removed
+                if self.index.is_empty(self.domains[x]):
+                    return False
+                for z in self.crossword.neighbors(x):
+                    if z != y and (z, x) not in queued:
+                        queued.add((z, x))
+                        pending.append((z, x))
+        return True
+
+    def forward_check(self, var, assignment, saved):
+        """Prune unassigned neighbors of var, return False on a domain wipeout"""
+        for neighbor in self.crossword.neighbors(var):
+            if neighbor in assignment:
+                continue
+            removed = self.revise(neighbor, var, saved)
+            if removed:
+                self.stats.pruned["forward"] += removed
+                if self.index.is_empty(self.domains[neighbor]):
+                    return False
+        return True
+
+    def infer(self, var, assignment, saved):
+        """Run the configured inference after assigning var"""
+        if self.inference == "forward":
+            return self.forward_check(var, assignment, saved)
+        if self.inference == "mac":
+            arcs = [
+                (neighbor, var) for neighbor in self.crossword.neighbors(var)
+                if neighbor not in assignment
+            ]
+            return self.ac3(arcs, saved, stage="mac")
+        return True
+
+    def restore(self, saved):
+        """Undo domain changes recorded by revise"""
+        for var, domain in saved.items():
+            self.domains[var] = domain
+
+    def backtrack(self, assignment):
+        """Backtracking search"""
+        if len(assignment) == len(self.variables):
+            return True
+        self.enter_node(assignment)
+
+        # Select unassigned variable
+        var = self.select_unassigned_variable(assignment)
+        letter_at = self.letter_at(assignment) if self.nogoods is not None else None
+
+        for word in self.consistent_values(var, assignment):
+            assignment[var] = word
+
+            # Skip words completing a pattern that failed before
+            if letter_at and self.nogoods.matches(zip(var.cells, word), letter_at):
+                self.stats.pruned["nogood"] += 1
+                del assignment[var]
+                continue
+
+            # Narrow var to the chosen word while it is assigned
+            saved = {var: self.domains[var]}
+            self.domains[var] = self.index.single(var.length, self.index.word_id(word))
+            if self.hooks:
+                self.emit("assign", var, word, assignment)
+
+            if self.infer(var, assignment, saved):
+                if self.backtrack(assignment):
+                    return True
+
+            if self.hooks:
+                self.emit("unassign", var, word, assignment)
+            self.restore(saved)
+            del assignment[var]
+            self.stats.backtracks += 1
+
+        # Every word failed: the letters around the unassigned region are a nogood
+        if self.nogoods is not None:
+            self.nogoods.add(self.boundary(assignment))
+        return False
+
+    def backjump(self, assignment):
+        """Conflict-directed backjumping search
+
+        Returns (True, None) once assignment is complete, otherwise
+        (False, conflicts) where conflicts is the set of assigned variables
+        that explain why no word fits the variable chosen here. A caller
+        whose variable is not in that set cannot fix the failure by trying
+        its next word, so it returns the set upward and the search jumps
+        straight back to the deepest culprit.
+        """
+        if len(assignment) == len(self.variables):
+            return True, None
+        self.enter_node(assignment)
+
+        var = self.select_unassigned_variable(assignment)
+        letter_at = self.letter_at(assignment)
+
+        # Assignments that pruned var's domain share the blame for its failure
+        conflicts = set(self.fc_conflicts[var])
+
+        for word in self.order_domain_values(var, assignment):
+            assignment[var] = word
+            culprits = self.culprits(var, word, assignment, letter_at)
+            if culprits:
+                conflicts |= culprits
+                del assignment[var]
+                continue
+
+            # Narrow var to the chosen word while it is assigned
+            saved = {var: self.domains[var]}
+            self.domains[var] = self.index.single(var.length, self.index.word_id(word))
+            if self.hooks:
+                self.emit("assign", var, word, assignment)
+
+            pruned = []
+            wiped = None
+            if self.inference == "forward":
+                wiped = self.forward_check_conflicts(var, assignment, saved, pruned)
+
+            if wiped is not None:
+                conflicts |= self.fc_conflicts[wiped]
+            else:
+                solved, child_conflicts = self.backjump(assignment)
+                if solved:
+                    return True, None
+                if var not in child_conflicts:
+                    # Nothing var could take would help, jump over it
+                    self.undo_assignment(var, assignment, saved, pruned)
+                    return False, child_conflicts
+                conflicts |= child_conflicts
+
+            self.undo_assignment(var, assignment, saved, pruned)
+            self.stats.backtracks += 1
+
+        conflicts.discard(var)
+        self.record_conflict(conflicts, assignment)
+        return False, conflicts
+
+    def culprits(self, var, word, assignment, letter_at):
+        """Return the assigned variables ruling out var=word, or an empty set if none do"""
+        self.stats.consistent_calls += 1
+        culprits = set()
+        for other, (i, j) in self.crossword.neighbors(var).items():
+            other_word = assignment.get(other)
+            if other_word is not None and other_word[j] != word[i]:
+                culprits.add(other)
+        if culprits or self.nogoods is None:
+            return culprits
+
+        pattern = self.nogoods.matches(zip(var.cells, word), letter_at)
+        if pattern:
+            self.stats.pruned["nogood"] += 1
+            # Blame one assigned variable placing each letter of the pattern
+            for cell, _ in pattern:
+                for other, _ in self.crossword.cells[cell]:
+                    if other in assignment:
+                        culprits.add(other)
+                        break
+        return culprits
+
+    def forward_check_conflicts(self, var, assignment, saved, pruned):
+        """Forward check var, noting it as a culprit of each domain it prunes
+
+        Appends the pruned neighbors to pruned and returns the neighbor
+        whose domain was wiped out, or None.
+        """
+        for neighbor in self.crossword.neighbors(var):
+            if neighbor in assignment:
+                continue
+            removed = self.revise(neighbor, var, saved)
+            if removed:
+                self.stats.pruned["forward"] += removed
+                self.fc_conflicts[neighbor].add(var)
+                pruned.append(neighbor)
+                if self.index.is_empty(self.domains[neighbor]):
+                    return neighbor
+        return None
+
+    def undo_assignment(self, var, assignment, saved, pruned):
+        """Undo var's assignment and the forward checking it did"""
+        if self.hooks:
+            self.emit("unassign", var, assignment[var], assignment)
+        for neighbor in pruned:
+            self.fc_conflicts[neighbor].discard(var)
+        self.restore(saved)
+        del assignment[var]
+
+    def record_conflict(self, conflicts, assignment):
+        """Record the letters a conflict set places around itself as a nogood
+
+        No solution can contain the conflict set's words, and its words only
+        influence other slots through the letters on cells they share, so no
+        solution places those letters either.
+        """
+        if self.nogoods is None:
+            return
+        pattern = set()
+        for var in conflicts:
+            word = assignment[var]
+            for neighbor, (i, j) in self.crossword.neighbors(var).items():
+                if neighbor not in conflicts:
+                    pattern.add((var.cells[i], word[i]))
+        self.nogoods.add(frozenset(pattern))
+
+    def letter_at(self, assignment):
+        """Return a function giving the letter assignment places on a cell"""
+        cells = self.crossword.cells
+
+        def letter(cell):
+            for var, idx in cells.get(cell, ()):
+                word = assignment.get(var)
+                if word is not None:
+                    return word[idx]
+            return None
+
+        return letter
+
+    def boundary(self, assignment):
+        """Return the (cell, letter) pairs assigned words place on unassigned slots"""
+        pattern = set()
+        for var, word in assignment.items():
+            for neighbor, (i, j) in self.crossword.neighbors(var).items():
+                if neighbor not in assignment:
+                    pattern.add((var.cells[i], word[i]))
+        return frozenset(pattern)
+    
+    def select_unassigned_variable(self, assignment):
+        """Select next variable to assign"""
+        unassigned = [v for v in self.variables if v not in assignment]
+        if not unassigned:
+            return None
+        if self.strategy == "first":
+            return unassigned[0]
+
+        # Minimum remaining values, then highest degree among unassigned
+        # neighbors, then grid position so ties never depend on set order
+        # (or at random when the solve was seeded)
+        def key(var):
+            degree = sum(1 for n in self.crossword.neighbors(var) if n not in assignment)
+            if self.rng is not None:
+                return (self.index.size(self.domains[var]), -degree, self.rng.random())
+            return (self.index.size(self.domains[var]), -degree, var.i, var.j, var.direction)
+
+        return min(unassigned, key=key)
+
+    def order_domain_values(self, var, assignment, domain=None):
+        """Order the words of domain, var's whole domain by default"""
+        if domain is None:
+            domain = self.domains[var]
+        words = self.index.decode(var.length, domain)
+        if self.rng is not None:
+            # Seeded solves break value ties at random, sorting below is stable
+            self.rng.shuffle(words)
+        if self.strategy != "mrv-lcv":
+            return words
+
+        # Least constraining value: count how many neighbor values each
+        # word would rule out, through the letter counts on each overlap
+        constraints = []
+        for neighbor, (i, j) in self.crossword.neighbors(var).items():
+            if neighbor in assignment:
+                continue
+            domain = self.domains[neighbor]
+            counts = defaultdict(int)
+            for letter in self.index.letters(neighbor.length, j, domain):
+                mask = self.index.mask(neighbor.length, j, letter)
+                counts[letter] = self.index.size(domain & mask)
+            constraints.append((i, self.index.size(domain), counts))
+
+        def ruled_out(word):
+            return sum(total - counts[word[i]] for i, total, counts in constraints)
+
+        return sorted(words, key=ruled_out)
+    
+    def consistent_values(self, var, assignment):
+        """Return the ordered domain values of var consistent with assignment
+
+        The domain is filtered against the crossing letters at once, an AND
+        with the letter masks of each crossing, and only the words left are
+        decoded and ordered.
+        """
+        return self.order_domain_values(var, assignment, self.consistent_domain(var, assignment))
+
+    def consistent_domain(self, var, assignment):
+        """Return var's domain restricted to the letters its assigned neighbors place on it"""
+        self.stats.consistent_calls += 1
+        crossings = [
+            (i, assignment[other][j])
+            for other, (i, j) in self.crossword.neighbors(var).items()
+            if other in assignment
+        ]
+        return self.index.match(var.length, crossings, self.domains[var])
+
+    def letter_grid(self, assignment):
+        """Create letter grid from assignment"""
+        return self.crossword.letter_grid(assignment)
+
+class IncrementalSolver:
+    """Re-solves a crossword as its structure and word list are edited
+
+    Keeps the previous crossword, word index and solution. update() diffs
+    new input against them: an unchanged word list is not parsed again, an
+    edited one only re-indexes the word lengths that changed, and the
+    crossword is derived from the previous one. solve() then repairs the
+    previous solution instead of starting from an empty assignment.
+    """
+    def __init__(self):
+        self.crossword = None
+        self.assignment = None
+        self.changed = set()
+        self.words_digest = None
+        self.word_set = frozenset()
+        self.word_scores = {}
+
+    def update(self, structure_text, words_text=None, words_file=None):
+        """Apply edited input, return the crossword to solve
+
+        The words are read from words_file (see open_text()) when it is
+        given, else parsed from words_text. A words file is only read again
+        when its size or modification time changed.
+        """
+        if words_file is not None:
+            stat = os.stat(source_file(words_file))
+            digest = f"{os.path.abspath(words_file)}:{stat.st_size}:{stat.st_mtime_ns}"
+        else:
+            digest = hashlib.sha1(words_text.encode("utf-8")).hexdigest()
+        index = self.crossword.index if self.crossword else None
+        if digest != self.words_digest and words_file is not None:
+            # Stream the file into a fresh index rather than diffing
+            index = Crossword(words_file=words_file).index
+            store = index.store
+            self.words_digest = digest
+            self.word_set = frozenset(store)
+            self.word_scores = {
+                store.word(length, k): store.score(length, k)
+                for length in store.scores for k in range(store.count(length))
+            }
+        elif digest != self.words_digest:
+            parsed = parse_words(words_text)
+            words = frozenset(parsed)
+            scores = {word: score for word, score in parsed.items() if score is not None}
+            if index is None:
+                index = WordIndex(WordStore.from_words(words, scores))
+            else:
+                # A word whose score changed is removed and added back
+                rescored = set(
+                    word for word in words & self.word_set
+                    if scores.get(word) != self.word_scores.get(word)
+                )
+                index = index.updated((words - self.word_set) | rescored,
+                                      (self.word_set - words) | rescored, scores)
+            self.words_digest = digest
+            self.word_set = words
+            self.word_scores = scores
+
+        if self.crossword is None:
+            self.crossword = Crossword(structure_text=structure_text, word_index=index)
+            self.changed = set(self.crossword.variables)
+        else:
+            self.crossword, self.changed = self.crossword.derive(structure_text, index)
+        return self.crossword
+
+    def solve(self, creator, **options):
+        """Solve with a CrosswordCreator of the current crossword, warm-starting when possible"""
+        if self.assignment:
+            assignment = creator.repair(self.assignment, self.changed, **options)
+        else:
+            assignment = creator.solve(**options)
+        if assignment is not None:
+            self.assignment = assignment
+            self.changed = set()
+        return assignment
+
+    def reset(self):
+        """Forget the previous input and solution"""
+        self.__init__()
+
+# Search configurations raced by CrosswordCreator.solve(portfolio=N);
+# workers beyond these reuse them with random seeds
+PORTFOLIO_CONFIGS = [
+    {"inference": "forward", "strategy": "mrv"},
+    {"inference": "forward", "strategy": "mrv-lcv"},
+    {"inference": "mac", "strategy": "mrv"},
+    {"inference": "mac", "strategy": "mrv-lcv"},
+    {"inference": "forward", "strategy": "mrv", "restarts": "luby", "learn": True},
+]
+
+def portfolio_configs(workers, seed=None):
+    """Return the search configuration of each of workers portfolio processes"""
+    rng = random.Random(seed)
+    configs = []
+    for k in range(workers):
+        config = dict(PORTFOLIO_CONFIGS[k % len(PORTFOLIO_CONFIGS)])
+        if k >= len(PORTFOLIO_CONFIGS) or seed is not None:
+            config["seed"] = rng.randrange(2 ** 32)
+        configs.append(config)
+    return configs
+
+def _portfolio_worker(crossword, config, timeout, results, backend="bitset"):
+    """Process entry point for one portfolio configuration"""
+    try:
+        creator = CrosswordCreator(crossword, backend=backend)
+        assignment = creator.solve(timeout=timeout, **config)
+        results.put((config, creator.status, assignment, creator.stats))
+    except Exception as e:
+        results.put((config, "error", str(e), None))
+
+# Crossword whose components a component worker process solves, and the
+# backend of its domains
+_component_crossword = None
+_component_backend = "bitset"
+
+def _init_component_worker(crossword, backend="bitset"):
+    """Receive the crossword once per component worker process"""
+    global _component_crossword, _component_backend
+    _component_crossword = crossword
+    _component_backend = backend
+
+def _solve_component_job(slots, domains, options, timeout):
+    """Process pool entry point for one grid component"""
+    try:
+        creator = CrosswordCreator(_component_crossword, variables=slots, backend=_component_backend)
+        creator.domains = domains
+        assignment = creator.solve(timeout=timeout, **options)
+        return assignment, creator.status, creator.stats
+    except Exception as e:
+        return str(e), "error", None
+
+# Word index and component solution cache shared by every puzzle a batch
+# worker process solves
+_batch_index = None
+_batch_cache = None
+
+def _init_batch_worker(words_file, cache_file=None):
+    """Load the batch word list and solution cache once per worker process"""
+    global _batch_index, _batch_cache
+    _batch_index = Crossword(words_file=words_file).index
+    _batch_cache = SolutionCache(path=cache_file) if cache_file else None
+
+def solve_puzzle(structure_file, word_index, timeout=None, inference="forward", strategy="mrv",
+                 cache=None, optimize=False, backend="bitset", structure_text=None, cancel_event=None):
+    """Solve one structure file, return a JSON-serializable result dict
+
+    With a SolutionCache, the grid is solved component by component and
+    components solved before are taken from the cache. optimize=True
+    searches for the best-scoring fill instead (see
+    CrosswordCreator.optimize()) and adds its score to the result.
+    structure_text is solved instead of a file when given, and setting
+    cancel_event stops the solve.
+    """
+    started = time.monotonic()
+    result = {"structure": structure_file}
+    try:
+        crossword = Crossword(structure_file=structure_file, structure_text=structure_text,
+                              word_index=word_index)
+        loaded = time.monotonic()
+
+        creator = CrosswordCreator(crossword, cancel_event=cancel_event, backend=backend)
+        if optimize:
+            assignment = creator.optimize(inference=inference, strategy=strategy, timeout=timeout)
+        else:
+            assignment = creator.solve(inference=inference, strategy=strategy, timeout=timeout,
+                                       cache=cache)
+        solved = time.monotonic()
+    except Exception as e:
+        result.update(status="error", error=str(e))
+        result["timing"] = {"total": time.monotonic() - started}
+        return result
+
+    letters = creator.letter_grid(assignment or {})
+    result["status"] = creator.status
+    if optimize and assignment is not None:
+        result["score"] = creator.best_score
+    result["grid"] = [
+        "".join(
+            (letters[i][j] or "_") if crossword.structure[i][j] else "#"
+            for j in range(crossword.width)
+        )
+        for i in range(crossword.height)
+    ]
+    result["assignment"] = [
+        {
+            "i": var.i,
+            "j": var.j,
+            "direction": "across" if var.direction == 0 else "down",
+            "length": var.length,
+            "word": word,
+        }
+        for var, word in sorted((assignment or {}).items(),
+                                key=lambda item: (item[0].direction, item[0].i, item[0].j))
+    ]
+    result["timing"] = {
+        "load": loaded - started,
+        "solve": solved - loaded,
+        "total": solved - started,
+    }
+    result["stats"] = creator.stats.to_dict()
+    result["stats"]["variables"] = len(crossword.variables)
+    return result
+
+def _solve_batch_job(structure_file, timeout, inference, strategy, optimize, backend):
+    """Process pool entry point for one puzzle"""
+    return solve_puzzle(structure_file, _batch_index, timeout, inference, strategy, _batch_cache,
+                        optimize, backend)
+
+def iter_batch(structure_files, words_file, jobs=None, timeout=None, inference="forward", strategy="mrv",
+               cache_file=None, optimize=False, backend="bitset"):
+    """Solve many structure files in parallel, yield results as they finish
+
+    cache_file names a SolutionCache file shared by the workers; each one
+    merges its new component solutions into it after every puzzle.
+    """
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_batch_worker,
+                             initargs=(words_file, cache_file)) as pool:
+        futures = {
+            pool.submit(_solve_batch_job, structure_file, timeout, inference, strategy,
+                        optimize, backend): structure_file
+            for structure_file in structure_files
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                # The worker process itself failed, e.g. it was killed
+                yield {"structure": futures[future], "status": "error", "error": str(e)}
+
+# Word files larger than this many bytes are not loaded into the GUI text box
+GUI_TEXT_LIMIT = 1 << 20
+
+class CrosswordRenderer:
+    """Draws a crossword on a Tk canvas, touching only what changed
+
+    Canvas items are created once per cell, when the cell first scrolls
+    into view, and then kept: showing another (partial) fill only edits
+    the text of visible cells whose letter changed, and cells out of view
+    catch up when they are scrolled to. Items are created in batches from
+    the event loop, so painting a large grid never blocks the UI.
+    """
+    cell_size = 40
+    margin = 10
+    batch_size = 500
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.crossword = None
+        self.layout = None
+        self.numbers = {}
+        self.letters = {}
+        self.shown = {}
+        self.texts = {}
+        self.drawn = set()
+        self.pending = None
+
+    def show(self, crossword, assignment):
+        """Display assignment, which may be partial, on the grid of crossword"""
+        layout = (crossword.height, crossword.width, crossword.structure)
+        if layout != self.layout:
+            self.reset(crossword)
+        self.crossword = crossword
+        self.letters = {
+            cell: word[idx]
+            for variable, word in assignment.items()
+            for idx, cell in enumerate(variable.cells)
+        }
+        self.schedule()
+
+    def reset(self, crossword):
+        """Drop the items of the previous grid and size the canvas for crossword"""
+        self.canvas.delete("grid")
+        self.layout = (crossword.height, crossword.width, crossword.structure)
+        self.numbers = crossword.word_numbers()
+        self.shown = {}
+        self.texts = {}
+        self.drawn = set()
+        self.canvas.config(scrollregion=(
+            0, 0,
+            crossword.width * self.cell_size + 2 * self.margin,
+            crossword.height * self.cell_size + 2 * self.margin,
+        ))
+
+    def clear(self):
+        """Remove the grid from the canvas"""
+        self.canvas.delete("all")
+        self.crossword = None
+        self.layout = None
+        self.letters = {}
+        self.shown = {}
+        self.texts = {}
+        self.drawn = set()
+
+    def schedule(self):
+        """Render on the next turn of the event loop, once however often called"""
+        if self.pending is None:
+            self.pending = self.canvas.after(1, self.render)
+
+    def visible_cells(self):
+        """Yield the cells in the scrolled viewport, row by row"""
+        size = self.cell_size
+        left = self.canvas.canvasx(0) - self.margin
+        top = self.canvas.canvasy(0) - self.margin
+        width = max(self.canvas.winfo_width(), 1)
+        height = max(self.canvas.winfo_height(), 1)
+        first_i = max(0, int(top // size))
+        first_j = max(0, int(left // size))
+        last_i = min(self.crossword.height, int((top + height) // size) + 1)
+        last_j = min(self.crossword.width, int((left + width) // size) + 1)
+        for i in range(first_i, last_i):
+            for j in range(first_j, last_j):
+                yield i, j
+
+    def render(self):
+        """Create the items of up to batch_size visible cells and update visible letters"""
+        self.pending = None
+        if self.crossword is None:
+            return
+        created = 0
+        for cell in self.visible_cells():
+            if cell not in self.drawn:
+                if created == self.batch_size:
+                    # Leave the rest for the next turn of the event loop
+                    self.schedule()
+                    continue
+                self.draw_cell(*cell)
+                created += 1
+            text = self.texts.get(cell)
+            if text is not None:
+                letter = self.letters.get(cell, "")
+                if self.shown.get(cell, "") != letter:
+                    self.canvas.itemconfig(text, text=letter)
+                    self.shown[cell] = letter
+
+    def draw_cell(self, i, j):
+        """Create the canvas items of one cell"""
+        size = self.cell_size
+        x0 = j * size + self.margin
+        y0 = i * size + self.margin
+        if self.crossword.structure[i][j]:
+            self.canvas.create_rectangle(x0, y0, x0 + size, y0 + size,
+                                         fill="white", outline="black", width=2, tags="grid")
+            self.texts[(i, j)] = self.canvas.create_text(x0 + size // 2, y0 + size // 2, text="",
+                                                         font=("Arial", 16, "bold"), fill="black",
+                                                         tags="grid")
+            number = self.numbers.get((i, j))
+            if number is not None:
+                self.canvas.create_text(x0 + 5, y0 + 5, text=str(number),
+                                        font=("Arial", 8, "bold"), fill="blue", anchor="nw",
+                                        tags="grid")
+        else:
+            self.canvas.create_rectangle(x0, y0, x0 + size, y0 + size,
+                                         fill="gray", outline="darkgray", tags="grid")
+        self.drawn.add((i, j))
+
+class CrosswordGUI:
+    def __init__(self, master):
+        self.master = master
+        self.master.title("Crossword Puzzle Generator")
+        self.master.geometry("1200x800")
+        
+        # Initialize variables
+        self.assignment = None
+        self.crossword = None
+        
+        # Background generation state
+        self.worker = None
+        self.creator = None
+        self.cancel_event = None
+        self.solve_result = None
+        self.solve_started = None
+        self.stats = None
+        
+        # Large word files are read from disk when generating instead of
+        # being loaded into the words text box, which shows a placeholder
+        self.words_file = None
+        self.words_placeholder = None
+        
+        # Partial fill of the running solve, written by a solver hook
+        self.progress = {}
+        self.progress_lock = threading.Lock()
+        
+        # Reuses parsing and the last solution between generations
+        self.incremental = IncrementalSolver()
+        
+        self.setup_ui()
+    
+    def setup_ui(self):
+        # Create main frame
+        main_frame = ttk.Frame(self.master, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        # Configure grid weights
+        self.master.columnconfigure(0, weight=1)
+        self.master.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(1, weight=1)
+        main_frame.rowconfigure(2, weight=1)
+        
+        # Input frame
+        input_frame = ttk.LabelFrame(main_frame, text="Input", padding="10")
+        input_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        input_frame.columnconfigure(1, weight=1)
+        
+        # Structure input
+        ttk.Label(input_frame, text="Structure:").grid(row=0, column=0, sticky=tk.W, pady=(0, 5))
+        ttk.Label(input_frame, text="(Use '_' for empty cells, '#' for blocked cells)").grid(row=0, column=1, sticky=tk.W, pady=(0, 5))
+        
+        self.structure_text = tk.Text(input_frame, height=8, width=50)
+        self.structure_text.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        structure_scroll = ttk.Scrollbar(input_frame, orient=tk.VERTICAL, command=self.structure_text.yview)
+        structure_scroll.grid(row=1, column=2, sticky=(tk.N, tk.S), pady=(0, 10))
+        self.structure_text.config(yscrollcommand=structure_scroll.set)
+        
+        # Words input
+        ttk.Label(input_frame, text="Words:").grid(row=2, column=0, sticky=tk.W, pady=(0, 5))
+        ttk.Label(input_frame, text="(One word per line)").grid(row=2, column=1, sticky=tk.W, pady=(0, 5))
+        
+        self.words_text = tk.Text(input_frame, height=8, width=50)
+        self.words_text.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        words_scroll = ttk.Scrollbar(input_frame, orient=tk.VERTICAL, command=self.words_text.yview)
+        words_scroll.grid(row=3, column=2, sticky=(tk.N, tk.S), pady=(0, 10))
+        self.words_text.config(yscrollcommand=words_scroll.set)
+        
+        # Control frame
+        control_frame = ttk.Frame(main_frame)
+        control_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        # Buttons
+        ttk.Button(control_frame, text="Load Structure File", 
+                  command=self.load_structure_file).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(control_frame, text="Load Words File", 
+                  command=self.load_words_file).pack(side=tk.LEFT, padx=(0, 5))
+        self.generate_button = ttk.Button(control_frame, text="Generate Crossword", 
+                  command=self.generate_crossword)
+        self.generate_button.pack(side=tk.LEFT, padx=(0, 5))
+        self.cancel_button = ttk.Button(control_frame, text="Cancel", 
+                  command=self.cancel_generation, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(control_frame, text="Clear Canvas", 
+                  command=self.clear_canvas).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(control_frame, text="Clear All", 
+                  command=self.clear_all).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(control_frame, text="Export Stats", 
+                  command=self.export_stats).pack(side=tk.LEFT, padx=(0, 5))
+        
+        # Time budget for a single generation
+        ttk.Label(control_frame, text="Time limit (s):").pack(side=tk.LEFT, padx=(10, 5))
+        self.time_limit_var = tk.StringVar(value="30")
+        ttk.Spinbox(control_frame, from_=1, to=3600, width=6, 
+                   textvariable=self.time_limit_var).pack(side=tk.LEFT)
+        
+        # Status label
+        self.status_label = ttk.Label(main_frame, text="Enter structure and words, then click Generate Crossword")
+        self.status_label.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 5))
+        
+        # Canvas with scrollbars
+        canvas_frame = ttk.LabelFrame(main_frame, text="Crossword", padding="5")
+        canvas_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
+        canvas_frame.columnconfigure(0, weight=1)
+        canvas_frame.rowconfigure(0, weight=1)
+        
+        self.canvas = tk.Canvas(canvas_frame, width=800, height=400, bg="white")
+        
+        # Scrollbars
+        v_scrollbar = ttk.Scrollbar(canvas_frame, orient=tk.VERTICAL, command=self.canvas.yview)
+        h_scrollbar = ttk.Scrollbar(canvas_frame, orient=tk.HORIZONTAL, command=self.canvas.xview)
+        
+        # Only visible cells are drawn, so scrolling and resizing render more
+        self.renderer = CrosswordRenderer(self.canvas)
+        
+        def on_yscroll(first, last):
+            v_scrollbar.set(first, last)
+            self.renderer.schedule()
+        
+        def on_xscroll(first, last):
+            h_scrollbar.set(first, last)
+            self.renderer.schedule()
+        
+        self.canvas.configure(yscrollcommand=on_yscroll, xscrollcommand=on_xscroll)
+        self.canvas.bind("<Configure>", lambda event: self.renderer.schedule())
+        
+        # Grid scrollbars and canvas
+        self.canvas.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        v_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        h_scrollbar.grid(row=1, column=0, sticky=(tk.W, tk.E))
+        
+        # Add sample data
+        self.add_sample_data()
+    
+    def add_sample_data(self):
+        """Add sample data to help users understand the format"""
+        sample_structure = """#___#
+#_##_
+#_##_
+#_##_
+#____"""
+        
+        sample_words = """one
+two
+three
+four
+five
+six
+seven
+eight
+nine
+ten"""
+        
+        self.structure_text.insert(tk.END, sample_structure)
+        self.words_text.insert(tk.END, sample_words)
+    
+    def load_structure_file(self):
+        """Load structure from file"""
+        filename = filedialog.askopenfilename(
+            title="Select Structure File",
+            filetypes=[("Text Files", "*.txt"), ("Compressed Files", "*.gz *.zip"), ("All Files", "*.*")]
+        )
+        
+        if filename:
+            try:
+                # Validate while reading, so errors point at the line and column
+                with open_text(filename) as f:
+                    rows = parse_structure(f, os.path.basename(filename))
+                content = "\n".join("".join("_" if cell else "#" for cell in row) for row in rows)
+                self.structure_text.delete(1.0, tk.END)
+                self.structure_text.insert(1.0, content)
+                self.status_label.config(text=f"Structure loaded: {os.path.basename(filename)}")
+                messagebox.showinfo("Success", f"Structure file loaded: {os.path.basename(filename)}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not load structure file: {str(e)}")
+    
+    def load_words_file(self):
+        """Load words from file"""
+        filename = filedialog.askopenfilename(
+            title="Select Words File",
+            filetypes=[("Text Files", "*.txt"), ("Compressed Files", "*.gz *.zip"), ("All Files", "*.*")]
+        )
+        
+        if filename:
+            try:
+                size = os.path.getsize(filename)
+                if size > GUI_TEXT_LIMIT or filename.lower().endswith((".gz", ".zip")):
+                    # Too big to edit, generation streams it from the file
+                    with open_text(filename):
+                        pass
+                    content = f"# {os.path.basename(filename)} ({size:,} bytes) is read from disk when generating"
+                    self.words_file = filename
+                    self.words_placeholder = content
+                else:
+                    with open(filename, 'r') as f:
+                        content = f.read()
+                    self.words_file = None
+                    self.words_placeholder = None
+                self.words_text.delete(1.0, tk.END)
+                self.words_text.insert(1.0, content)
+                self.status_label.config(text=f"Words loaded: {os.path.basename(filename)}")
+                messagebox.showinfo("Success", f"Words file loaded: {os.path.basename(filename)}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not load words file: {str(e)}")
+    
+    def generate_crossword(self):
+        """Start generating the crossword puzzle in a background thread"""
+        if self.worker and self.worker.is_alive():
+            return
+        
+        structure_content = self.structure_text.get(1.0, tk.END).strip()
+        words_content = self.words_text.get(1.0, tk.END).strip()
+        
+        if not structure_content or not words_content:
+            messagebox.showerror("Error", "Please enter both structure and words.")
+            return
+        
+        try:
+            time_limit = float(self.time_limit_var.get())
+            if time_limit <= 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "Time limit must be a positive number of seconds.")
+            return
+        
+        self.status_label.config(text="Generating crossword...")
+        self.generate_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        
+        # Stream the loaded words file unless the placeholder was edited
+        words_file = self.words_file if words_content == self.words_placeholder else None
+        
+        self.creator = None
+        self.solve_result = None
+        self.cancel_event = threading.Event()
+        self.solve_started = time.monotonic()
+        self.worker = threading.Thread(
+            target=self.solve_worker,
+            args=(structure_content, words_content, time_limit, words_file),
+            daemon=True
+        )
+        self.worker.start()
+        self.master.after(100, self.poll_generation)
+    
+    def solve_worker(self, structure_content, words_content, time_limit, words_file=None):
+        """Build and solve the crossword, runs off the Tk thread"""
+        try:
+            if words_file is not None:
+                crossword = self.incremental.update(structure_content, words_file=words_file)
+            else:
+                crossword = self.incremental.update(structure_content, words_content)
+            
+            if not crossword.variables:
+                self.solve_result = {"status": "no-variables", "crossword": crossword}
+                return
+            
+            if not crossword.words:
+                self.solve_result = {"status": "no-words", "crossword": crossword}
+                return
+            
+            # Create solver, published so the Tk thread can read its progress
+            creator = CrosswordCreator(crossword, cancel_event=self.cancel_event)
+            with self.progress_lock:
+                self.progress = {}
+            creator.add_hook(self.record_progress)
+            self.creator = creator
+            
+            # Solve, warm-starting from the previous solution
+            assignment = self.incremental.solve(creator, timeout=time_limit)
+            self.solve_result = {"status": creator.status, "crossword": crossword,
+                                 "assignment": assignment, "stats": creator.stats}
+        except Exception as e:
+            self.solve_result = {"status": "error", "error": str(e)}
+    
+    def record_progress(self, event, var, word, depth):
+        """Solver hook keeping the partial fill shown while generating"""
+        with self.progress_lock:
+            if event == "assign":
+                self.progress[var] = word
+            else:
+                self.progress.pop(var, None)
+    
+    def poll_generation(self):
+        """Show solver progress and pick up the result once the worker is done"""
+        if self.worker.is_alive():
+            elapsed = time.monotonic() - self.solve_started
+            creator = self.creator
+            if creator is not None:
+                self.status_label.config(text=(
+                    f"Generating crossword... {elapsed:.1f}s, "
+                    f"{creator.stats.nodes} nodes expanded, {creator.stats.backtracks} backtracks, "
+                    f"depth {creator.stats.depth}/{len(creator.crossword.variables)}"
+                ))
+                with self.progress_lock:
+                    partial = dict(self.progress)
+                self.renderer.show(creator.crossword, partial)
+            else:
+                self.status_label.config(text=f"Generating crossword... {elapsed:.1f}s, loading input")
+            self.master.after(100, self.poll_generation)
+            return
+        
+        self.generate_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+        self.finish_generation(self.solve_result)
+    
+    def finish_generation(self, result):
+        """Report the outcome of a finished generation"""
+        status = result["status"]
+        elapsed = time.monotonic() - self.solve_started
+        
+        if status == "error":
+            self.status_label.config(text="Error occurred")
+            messagebox.showerror("Error", f"An error occurred: {result['error']}")
+            return
+        
+        self.crossword = result["crossword"]
+        self.stats = result.get("stats")
+        if status != "solved":
+            # Drop the partial fill shown while generating
+            self.renderer.clear()
+        
+        if status == "no-variables":
+            messagebox.showerror("Error", "No valid word positions found in the structure.")
+            self.status_label.config(text="No valid word positions found")
+        elif status == "no-words":
+            messagebox.showerror("Error", "No valid words found in the word list.")
+            self.status_label.config(text="No valid words found")
+        elif status == "solved":
+            self.assignment = result["assignment"]
+            self.status_label.config(text=f"Crossword generated successfully in {elapsed:.2f}s!")
+            self.draw_crossword()
+            messagebox.showinfo("Success", "Crossword generated successfully!")
+        elif status == "cancelled":
+            self.status_label.config(text="Generation cancelled")
+        elif status == "timeout":
+            self.status_label.config(text=f"Gave up after {elapsed:.1f}s")
+            messagebox.showerror("Error", "No crossword found within the time limit. Try a longer limit, more words or a simpler structure.")
+        else:
+            self.status_label.config(text="Failed to generate crossword")
+            messagebox.showerror("Error", "Could not generate a valid crossword with the given words. Try adding more words or simplifying the structure.")
+    
+    def export_stats(self):
+        """Save the statistics of the last generation as JSON"""
+        if self.stats is None:
+            messagebox.showerror("Error", "Generate a crossword first.")
+            return
+        
+        filename = filedialog.asksaveasfilename(
+            title="Export Solver Statistics",
+            defaultextension=".json",
+            filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")]
+        )
+        
+        if filename:
+            try:
+                self.stats.export(filename)
+                self.status_label.config(text=f"Statistics exported: {os.path.basename(filename)}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not export statistics: {str(e)}")
+    
+    def cancel_generation(self):
+        """Stop a running generation"""
+        if self.worker and self.worker.is_alive():
+            self.cancel_event.set()
+            self.status_label.config(text="Cancelling...")
+    
+    def draw_crossword(self):
+        """Draw the crossword on canvas"""
+        if not self.crossword or not self.assignment:
+            return
+        
+        self.renderer.show(self.crossword, self.assignment)
+    
+    def clear_canvas(self):
+        """Clear the canvas"""
+        self.renderer.clear()
+        self.status_label.config(text="Canvas cleared")
+    
+    def clear_all(self):
+        """Clear everything"""
+        self.renderer.clear()
+        self.structure_text.delete(1.0, tk.END)
+        self.words_text.delete(1.0, tk.END)
+        self.assignment = None
+        self.crossword = None
+        self.words_file = None
+        self.words_placeholder = None
+        self.incremental.reset()
+        self.status_label.config(text="All cleared. Enter structure and words to begin.")
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Crossword puzzle generator. Without structure files the GUI is started; "
+                    "with them, puzzles are solved headless and printed as JSON lines."
+    )
+    parser.add_argument("structures", nargs="*", help="structure files to solve")
+    parser.add_argument("-w", "--words", help="word list shared by every puzzle")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes (default: number of CPUs)")
+    parser.add_argument("-t", "--timeout", type=float, default=None,
+                        help="time budget per puzzle in seconds")
+    parser.add_argument("--inference", choices=["none", "forward", "mac"], default="forward",
+                        help="pruning after each assignment")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="mrv",
+                        help="variable and value ordering")
+    parser.add_argument("--backend", choices=BACKENDS, default="bitset",
+                        help="domain representation; numpy needs NumPy installed")
+    parser.add_argument("-o", "--output", help="write JSON lines here instead of stdout")
+    parser.add_argument("--build-cache", action="store_true",
+                        help="write the binary cache of the word list before solving")
+    parser.add_argument("--optimize", action="store_true",
+                        help="find the best-scoring fill; the time budget returns the best so far")
+    parser.add_argument("--cache", metavar="FILE",
+                        help="solve grids component by component, reusing solutions stored in FILE")
+    args = parser.parse_args(argv)
+    if args.structures and not args.words:
+        parser.error("--words is required when structure files are given")
+    return args
+
+def main(argv=None):
+    """Run the batch CLI, or the GUI when no structure files are given"""
+    args = parse_args(argv)
+
+    if not args.structures:
+        if tk is None:
+            print("tkinter is not available, pass structure files to run headless", file=sys.stderr)
+            return 2
+        root = tk.Tk()
+        app = CrosswordGUI(root)
+        root.mainloop()
+        return 0
+
+    if args.build_cache:
+        build_word_cache(args.words)
+
+    inference = None if args.inference == "none" else args.inference
+    out = open(args.output, "w") if args.output else sys.stdout
+    failures = 0
+    try:
+        for result in iter_batch(args.structures, args.words, args.jobs, args.timeout,
+                                 inference, args.strategy, args.cache, args.optimize, args.backend):
+            if result["status"] not in ("solved", "optimal"):
+                failures += 1
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,636 @@
+"""Local puzzle generation service
+
+Serves crosswordAi solves over HTTP, on a TCP port or a Unix socket. Word
+lists are loaded once per worker process and stay in memory, solves run
+on a bounded process pool and requests wait in a bounded queue: when it
+is full, new requests are refused with 503 and a Retry-After header.
+Every request has a deadline, counted from its arrival, that stops its
+solve when it expires.
+
+    python crossword_service.py --words default=data/words2.txt --port 8080
+    curl -d '{"structure": "_____\\n_#_#_\\n_____", "wait": true}' localhost:8080/solve
+
+Routes:
+
+    POST   /solve              queue a solve, return its job id (the result with "wait": true)
+    GET    /jobs/<id>          job status, with the result once finished
+    GET    /jobs/<id>/events   job status as JSON lines, one per change, until finished
+    DELETE /jobs/<id>          cancel a job
+    GET    /dictionaries       loaded word lists
+    GET    /metrics            throughput, latency percentiles, queue depth, pool utilization
+    GET    /health             liveness
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import signal
+import stat
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+from crosswordAi import (BACKENDS, STRATEGIES, Crossword, build_word_cache, load_word_cache, np,
+                         parse_structure, solve_puzzle)
+
+INFERENCES = ("none", "forward", "mac")
+
+# Largest request body accepted, in bytes
+MAX_BODY = 1 << 20
+
+# Seconds allowed to send the request line and headers
+READ_TIMEOUT = 30
+
+# Seconds between status lines on an idle event stream
+HEARTBEAT = 15
+
+# Seconds between checks for cancellation in a worker process
+CANCEL_POLL = 0.1
+
+# Jobs kept for latency percentiles, and seconds counted for throughput
+METRICS_WINDOW = 1000
+RATE_WINDOW = 60
+
+class HttpError(Exception):
+    """A request that is answered with an error status"""
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+# Word indexes by dictionary name, and the ids of jobs to cancel, shared
+# with the service; set once per worker process
+_worker_indexes = {}
+_worker_cancelled = None
+
+def _init_worker(dictionaries, cancelled):
+    """Load every dictionary once per worker process"""
+    global _worker_indexes, _worker_cancelled
+    _worker_indexes = {
+        name: Crossword(words_file=path).index for name, path in dictionaries.items()
+    }
+    _worker_cancelled = cancelled
+
+def _worker_ready():
+    """Process pool entry point that returns once the worker is loaded"""
+    return os.getpid()
+
+def _run_job(job_id, options, timeout):
+    """Process pool entry point for one job, return its result dict
+
+    A watcher thread stops the solve when the service marks job_id
+    cancelled.
+    """
+    cancel_event = threading.Event()
+    finished = threading.Event()
+
+    def watch():
+        while not finished.wait(CANCEL_POLL):
+            try:
+                if job_id in _worker_cancelled:
+                    cancel_event.set()
+                    return
+            except Exception:
+                # The service is shutting down
+                return
+
+    threading.Thread(target=watch, daemon=True).start()
+    try:
+        result = solve_puzzle(None, _worker_indexes[options["words"]], timeout,
+                              options["inference"], options["strategy"],
+                              optimize=options["optimize"], backend=options["backend"],
+                              structure_text=options["structure"], cancel_event=cancel_event)
+    finally:
+        finished.set()
+    result.pop("structure", None)
+    return result
+
+def percentiles(values):
+    """Return the p50, p90, p99 and max of values, nearest rank"""
+    if not values:
+        return None
+    values = sorted(values)
+    summary = {}
+    for q in (50, 90, 99):
+        rank = max(0, -(-q * len(values) // 100) - 1)
+        summary[f"p{q}"] = values[rank]
+    summary["max"] = values[-1]
+    return summary
+
+class Job:
+    """One solve request, from arrival to its result"""
+    def __init__(self, options, timeout):
+        self.id = uuid.uuid4().hex
+        self.options = options
+        self.timeout = timeout
+        self.status = "queued"
+        self.result = None
+        self.submitted = time.monotonic()
+        self.deadline = self.submitted + timeout
+        self.started = None
+        self.finished = None
+
+        # Set and replaced on every status change
+        self.changed = asyncio.Event()
+
+    @property
+    def done(self):
+        return self.finished is not None
+
+    def update(self, status):
+        """Record a status change and wake whoever waits on it"""
+        self.status = status
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    async def wait(self):
+        """Return once the job is finished"""
+        while not self.done:
+            await self.changed.wait()
+
+    def to_dict(self):
+        """Return the job as a JSON-serializable dict, with its result once finished"""
+        now = time.monotonic()
+        job = {
+            "id": self.id,
+            "status": self.status,
+            "words": self.options["words"],
+            "timeout": self.timeout,
+            "queued": (self.started or self.finished or now) - self.submitted,
+        }
+        if self.started is not None:
+            job["running"] = (self.finished or now) - self.started
+        if self.result is not None:
+            job["result"] = self.result
+        return job
+
+class Metrics:
+    """Throughput and latency of finished jobs"""
+    def __init__(self, window=METRICS_WINDOW, rate_window=RATE_WINDOW):
+        self.started = time.monotonic()
+        self.statuses = defaultdict(int)
+        self.rejected = 0
+        self.rate_window = rate_window
+
+        # (finished, queue wait, run time, total time) of the latest jobs
+        self.samples = deque(maxlen=window)
+
+        # (finished, run time) of the jobs finished within rate_window
+        self.recent = deque()
+
+    def record(self, job):
+        """Count a finished job"""
+        self.statuses[job.status] += 1
+        started = job.started or job.finished
+        run = job.finished - started
+        self.samples.append((job.finished, started - job.submitted, run, job.finished - job.submitted))
+        self.recent.append((job.finished, run))
+
+    def to_dict(self, workers, running, queued, queue_size, retained):
+        """Return the metrics as a JSON-serializable dict"""
+        now = time.monotonic()
+        while self.recent and self.recent[0][0] < now - self.rate_window:
+            self.recent.popleft()
+        window = min(self.rate_window, now - self.started) or 1
+        busy = sum(min(run, window) for _, run in self.recent) + sum(running.values())
+        return {
+            "uptime": now - self.started,
+            "workers": workers,
+            "running": len(running),
+            "queued": queued,
+            "queue_size": queue_size,
+            "jobs": retained,
+            "completed": dict(self.statuses),
+            "rejected": self.rejected,
+            "throughput": {
+                "window": window,
+                "per_second": len(self.recent) / window,
+                # Share of the pool's time spent solving; near 1 means
+                # requests wait for workers
+                "utilization": min(1.0, busy / (workers * window)),
+            },
+            "latency": {
+                "samples": len(self.samples),
+                "queue": percentiles([sample[1] for sample in self.samples]),
+                "run": percentiles([sample[2] for sample in self.samples]),
+                "total": percentiles([sample[3] for sample in self.samples]),
+            },
+        }
+
+class SolverService:
+    """Job queue, process pool and HTTP handler of the service
+
+    dictionaries maps dictionary names to word files; the first one is
+    used by requests that name none. workers solves run at once, and
+    queue_size more wait for a worker.
+    """
+    def __init__(self, dictionaries, workers=None, queue_size=64, default_timeout=30,
+                 max_timeout=300, retention=600, grace=5):
+        if not dictionaries:
+            raise ValueError("At least one dictionary is required")
+        self.dictionaries = dict(dictionaries)
+        self.default_words = next(iter(self.dictionaries))
+        self.word_counts = {}
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.default_timeout = default_timeout
+        self.max_timeout = max_timeout
+        self.retention = retention
+        # Seconds a solve may overrun its deadline before the job is
+        # reported as timed out without waiting for it
+        self.grace = grace
+
+        self.jobs = {}
+        # Start time of each running job by id
+        self.running = {}
+        self.metrics = Metrics()
+        self.queue = None
+        self.pool = None
+        self.manager = None
+        self.cancelled = None
+        self.tasks = []
+
+    def preload(self):
+        """Write missing word caches so workers map them instead of parsing, count the words"""
+        for name, path in self.dictionaries.items():
+            index = load_word_cache(path)
+            if index is None:
+                try:
+                    build_word_cache(path)
+                    index = load_word_cache(path)
+                except OSError:
+                    # No cache next to a read-only word list, workers parse it
+                    index = None
+            if index is None:
+                index = Crossword(words_file=path).index
+            self.word_counts[name] = len(index.store)
+
+    async def start(self):
+        """Start the pool with every dictionary loaded, and the dispatchers"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.preload)
+
+        self.manager = multiprocessing.Manager()
+        self.cancelled = self.manager.dict()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                        initargs=(self.dictionaries, self.cancelled))
+        # One call per worker starts them all now rather than on the first requests
+        await asyncio.gather(*(
+            loop.run_in_executor(self.pool, _worker_ready) for _ in range(self.workers)
+        ))
+
+        self.queue = asyncio.Queue(self.queue_size)
+        self.tasks = [asyncio.create_task(self.dispatch()) for _ in range(self.workers)]
+        self.tasks.append(asyncio.create_task(self.prune()))
+
+    async def close(self):
+        """Cancel running solves, stop the dispatchers and shut the pool down"""
+        for job_id in self.running:
+            self.cancelled[job_id] = True
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, lambda: self.pool.shutdown(wait=True, cancel_futures=True))
+        self.manager.shutdown()
+
+    def submit(self, options, timeout):
+        """Queue a job, raise HttpError 503 if the queue is full"""
+        job = Job(options, timeout)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.metrics.rejected += 1
+            # A rough wait until a worker frees up
+            latency = percentiles([sample[2] for sample in self.metrics.samples])
+            retry = max(1, round(latency["p50"])) if latency else 1
+            raise HttpError(503, "queue is full, retry later", {"Retry-After": str(retry)})
+        self.jobs[job.id] = job
+        return job
+
+    def cancel(self, job):
+        """Cancel a queued or running job"""
+        if job.done:
+            return
+        if job.started is None:
+            # Dropped by the dispatcher when it reaches the job
+            self.finish(job, {"status": "cancelled"})
+        else:
+            self.cancelled[job.id] = True
+
+    def finish(self, job, result):
+        """Record the result of a job"""
+        job.finished = time.monotonic()
+        job.result = result
+        job.update(result["status"])
+        self.metrics.record(job)
+
+    async def dispatch(self):
+        """Run queued jobs on the pool, one at a time, until cancelled"""
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            if job.done:
+                continue
+            remaining = job.deadline - time.monotonic()
+            if remaining <= 0:
+                self.finish(job, {"status": "timeout", "error": "deadline expired in the queue"})
+                continue
+
+            job.started = time.monotonic()
+            self.running[job.id] = job.started
+            job.update("running")
+            future = loop.run_in_executor(self.pool, _run_job, job.id, job.options, remaining)
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), remaining + self.grace)
+            except asyncio.TimeoutError:
+                # The solve overran its deadline: report it now, then keep
+                # this worker slot until the solve notices the cancellation
+                self.cancelled[job.id] = True
+                self.finish(job, {"status": "timeout", "error": "solve overran its deadline"})
+                with contextlib.suppress(Exception):
+                    await future
+                result = None
+            except Exception as e:
+                # The worker process itself failed, e.g. it was killed
+                result = {"status": "error", "error": str(e)}
+            finally:
+                del self.running[job.id]
+            # Kept when the service closes, so the worker still sees it
+            self.cancelled.pop(job.id, None)
+            if result is not None:
+                self.finish(job, result)
+
+    async def prune(self):
+        """Forget finished jobs after the retention period"""
+        while True:
+            await asyncio.sleep(max(1, self.retention / 10))
+            expired = time.monotonic() - self.retention
+            for job_id in [job_id for job_id, job in self.jobs.items()
+                           if job.done and job.finished < expired]:
+                del self.jobs[job_id]
+
+    def parse_solve(self, body):
+        """Return (options, timeout, wait) of a POST /solve body, raise HttpError 400 if invalid"""
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            raise HttpError(400, "body is not valid JSON")
+        if not isinstance(request, dict):
+            raise HttpError(400, "body must be a JSON object")
+
+        structure = request.get("structure")
+        if isinstance(structure, list) and all(isinstance(row, str) for row in structure):
+            structure = "\n".join(structure)
+        if not isinstance(structure, str) or not structure.strip():
+            raise HttpError(400, "structure must be a non-empty string or list of rows")
+        try:
+            parse_structure(structure.split("\n"), "structure")
+        except Exception as e:
+            raise HttpError(400, str(e))
+
+        words = request.get("words", self.default_words)
+        if words not in self.dictionaries:
+            raise HttpError(400, f"unknown dictionary {words!r}, "
+                                 f"expected one of {', '.join(self.dictionaries)}")
+        inference = request.get("inference", "forward")
+        if inference not in INFERENCES:
+            raise HttpError(400, f"inference must be one of {', '.join(INFERENCES)}")
+        strategy = request.get("strategy", "mrv")
+        if strategy not in STRATEGIES:
+            raise HttpError(400, f"strategy must be one of {', '.join(STRATEGIES)}")
+        backend = request.get("backend", "bitset")
+        if backend not in BACKENDS:
+            raise HttpError(400, f"backend must be one of {', '.join(BACKENDS)}")
+        if backend == "numpy" and np is None:
+            raise HttpError(400, "the numpy backend needs NumPy, which is not installed")
+
+        timeout = request.get("timeout", self.default_timeout)
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0:
+            raise HttpError(400, "timeout must be a positive number of seconds")
+        options = {
+            "structure": structure,
+            "words": words,
+            "inference": None if inference == "none" else inference,
+            "strategy": strategy,
+            "backend": backend,
+            "optimize": bool(request.get("optimize", False)),
+        }
+        return options, min(timeout, self.max_timeout), bool(request.get("wait", False))
+
+    async def handle(self, reader, writer):
+        """Answer one HTTP request, then close the connection"""
+        try:
+            try:
+                request = await asyncio.wait_for(read_request(reader), READ_TIMEOUT)
+                if request is not None:
+                    await self.route(writer, *request)
+            except HttpError as e:
+                await send_json(writer, e.status, {"error": e.message}, e.headers)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+    async def route(self, writer, method, path, body):
+        """Dispatch a request to its route"""
+        parts = [part for part in path.split("/") if part]
+        if parts == ["solve"]:
+            allow(method, "POST")
+            options, timeout, wait = self.parse_solve(body)
+            job = self.submit(options, timeout)
+            if wait:
+                await job.wait()
+                await send_json(writer, 200, job.to_dict())
+            else:
+                await send_json(writer, 202, job.to_dict(), {"Location": f"/jobs/{job.id}"})
+        elif parts and parts[0] == "jobs" and len(parts) in (2, 3):
+            job = self.jobs.get(parts[1])
+            if job is None:
+                raise HttpError(404, f"no job {parts[1]}")
+            if len(parts) == 3:
+                if parts[2] != "events":
+                    raise HttpError(404, f"no route {path}")
+                allow(method, "GET")
+                await stream_job(writer, job)
+            elif method == "DELETE":
+                self.cancel(job)
+                await send_json(writer, 200, job.to_dict())
+            else:
+                allow(method, "GET", "DELETE")
+                await send_json(writer, 200, job.to_dict())
+        elif parts == ["metrics"]:
+            allow(method, "GET")
+            await send_json(writer, 200, self.metrics.to_dict(
+                self.workers,
+                {job_id: time.monotonic() - started for job_id, started in self.running.items()},
+                self.queue.qsize(), self.queue_size, len(self.jobs),
+            ))
+        elif parts == ["dictionaries"]:
+            allow(method, "GET")
+            await send_json(writer, 200, {
+                "default": self.default_words,
+                "dictionaries": [
+                    {"name": name, "path": path, "words": self.word_counts.get(name)}
+                    for name, path in self.dictionaries.items()
+                ],
+            })
+        elif parts == ["health"]:
+            allow(method, "GET")
+            await send_json(writer, 200, {"status": "ok"})
+        else:
+            raise HttpError(404, f"no route {path}")
+
+def allow(method, *methods):
+    """Raise HttpError 405 unless method is one of methods"""
+    if method not in methods:
+        raise HttpError(405, f"method {method} not allowed", {"Allow": ", ".join(methods)})
+
+async def read_request(reader):
+    """Read one HTTP/1.1 request, return (method, path, body) or None at end of stream"""
+    try:
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split()
+        except ValueError:
+            raise HttpError(400, "malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+    except ValueError:
+        # A line longer than the stream limit
+        raise HttpError(431, "request line or header too long")
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HttpError(411, "chunked request bodies are not supported, send Content-Length")
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HttpError(400, "invalid Content-Length")
+    if length < 0:
+        raise HttpError(400, "invalid Content-Length")
+    if length > MAX_BODY:
+        raise HttpError(413, f"body is larger than {MAX_BODY} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), urlsplit(target).path, body
+
+def response_head(status, headers):
+    """Return the status line and headers of a response as bytes"""
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    lines.append("Connection: close")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+async def send_json(writer, status, body, headers=None):
+    """Send body as a JSON response"""
+    data = (json.dumps(body) + "\n").encode()
+    head = {"Content-Type": "application/json", "Content-Length": len(data)}
+    head.update(headers or {})
+    writer.write(response_head(status, head) + data)
+    await writer.drain()
+
+async def stream_job(writer, job):
+    """Send the job as a line of JSON on every change, and periodically, until it finishes"""
+    writer.write(response_head(200, {"Content-Type": "application/x-ndjson",
+                                     "Transfer-Encoding": "chunked"}))
+    while True:
+        changed = job.changed
+        line = (json.dumps(job.to_dict()) + "\n").encode()
+        writer.write(b"%x\r\n%s\r\n" % (len(line), line))
+        await writer.drain()
+        if job.done:
+            break
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(changed.wait(), HEARTBEAT)
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+def parse_dictionary(value):
+    """Parse a --words value, NAME=PATH or PATH named after its file"""
+    name, sep, path = value.partition("=")
+    if not sep:
+        path = value
+        name = os.path.basename(value).split(".")[0]
+    if not name or not path:
+        raise argparse.ArgumentTypeError(f"expected NAME=PATH, got {value!r}")
+    return name, path
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Serve crossword generation over HTTP.")
+    parser.add_argument("-w", "--words", action="append", type=parse_dictionary, required=True,
+                        metavar="NAME=PATH",
+                        help="word list to preload, may be repeated; the first is the default")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: %(default)s)")
+    parser.add_argument("-p", "--port", type=int, default=8080, help="port to listen on (default: %(default)s)")
+    parser.add_argument("--unix", metavar="PATH", help="listen on this Unix socket instead of a port")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes (default: number of CPUs)")
+    parser.add_argument("--queue-size", type=int, default=64,
+                        help="requests waiting for a worker before new ones are refused (default: %(default)s)")
+    parser.add_argument("-t", "--timeout", type=float, default=30,
+                        help="deadline of requests that set none, in seconds (default: %(default)s)")
+    parser.add_argument("--max-timeout", type=float, default=300,
+                        help="longest deadline a request may set, in seconds (default: %(default)s)")
+    parser.add_argument("--retention", type=float, default=600,
+                        help="seconds finished jobs can still be fetched (default: %(default)s)")
+    return parser.parse_args(argv)
+
+async def serve(args):
+    """Run the service until SIGINT or SIGTERM"""
+    service = SolverService(dict(args.words), args.jobs, args.queue_size, args.timeout,
+                            args.max_timeout, args.retention)
+    await service.start()
+
+    if args.unix:
+        # Replace a socket left behind by an earlier run
+        with contextlib.suppress(FileNotFoundError):
+            if stat.S_ISSOCK(os.stat(args.unix).st_mode):
+                os.unlink(args.unix)
+        server = await asyncio.start_unix_server(service.handle, path=args.unix)
+        where = args.unix
+    else:
+        server = await asyncio.start_server(service.handle, args.host, args.port)
+        where = "http://{}:{}".format(*server.sockets[0].getsockname()[:2])
+    print(f"Serving on {where} with {service.workers} workers, "
+          f"dictionaries: {', '.join(service.dictionaries)}", flush=True)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(signum, stop.set)
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        await service.close()
+        if args.unix:
+            with contextlib.suppress(OSError):
+                os.unlink(args.unix)
+
+def main(argv=None):
+    """Run the service"""
+    args = parse_args(argv)
+    asyncio.run(serve(args))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())